@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta
+
+from repositories import get_repositories
+
+# Brojaci aktivnosti po danu i satu (kolekcija activity), uvecavaju se sa $inc pri svakom upisu.
+# Dashboard cita samo bucket-e za trazeni period, bez skeniranja ideja/evaluacija.
+# Istorija pre uvodjenja brojaca: python -m migrations up (0003_activity_rollups).
+
+COUNTERS = ("ideas", "evaluations", "likes", "follows")
+MAX_DAYS = 366
+MAX_HOURLY_DAYS = 31
+
+
+async def record_activity(**counters: int):
+    """record_activity(evaluations=1, likes=1) -> uvecava bucket za tekuci dan i sat (UTC)."""
+    counters = {name: by for name, by in counters.items() if by}
+    if counters:
+        await get_repositories().activity.increment(datetime.utcnow(), counters)
+
+
+def _empty() -> dict:
+    return {name: 0 for name in COUNTERS}
+
+
+async def activity_report(first: date, last: date, granularity: str = "day") -> dict:
+    docs = await get_repositories().activity.days(first.isoformat(), last.isoformat())
+    by_day = {doc["_id"]: doc for doc in docs}
+
+    buckets = []
+    totals = _empty()
+    day = first
+    while day <= last:
+        doc = by_day.get(day.isoformat(), {})
+        if granularity == "hour":
+            hours = doc.get("hours", {})
+            for hour in range(24):
+                counts = {name: hours.get(f"{hour:02d}", {}).get(name, 0) for name in COUNTERS}
+                start = datetime(day.year, day.month, day.day, hour)
+                buckets.append({"start": start.isoformat(), **counts})
+        else:
+            counts = {name: doc.get(name, 0) for name in COUNTERS}
+            buckets.append({"start": day.isoformat(), **counts})
+        for name in COUNTERS:
+            totals[name] += doc.get(name, 0)
+        day += timedelta(days=1)
+
+    return {
+        "from": first.isoformat(),
+        "to": last.isoformat(),
+        "granularity": granularity,
+        "totals": totals,
+        "buckets": buckets,
+    }
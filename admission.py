@@ -0,0 +1,232 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+
+from auth.jwt_handler import ALGORITHM, SECRET_KEY
+
+# Admission control: skupe rute su podeljene u klase po ceni. Svaka klasa ima
+#   - ogranicen broj zahteva koji se izvrsavaju istovremeno (semafor),
+#   - ogranicen red cekanja sa timeout-om (pun red / istekao timeout -> 503),
+#   - token bucket po klijentu (sub iz tokena ili IP) -> 429.
+# Jeftine rute ne prolaze kroz kontrolu, pa im latencija ostaje ista i kad su skupe zagusene.
+# Odbijeni zahtevi dobijaju Retry-After i ne dolaze do endpointa (ni do baze).
+
+
+class CostClass:
+    def __init__(self, name: str, concurrency: int, queue_size: int, queue_timeout: float,
+                 rate: float, burst: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout   # sekunde cekanja u redu pre 503
+        self.rate = rate                     # tokena u sekundi po klijentu
+        self.burst = burst                   # max tokena po klijentu
+
+
+COST_CLASSES = {
+    # citaju (skoro) celu kolekciju ili vise kolekcija
+    "heavy": CostClass("heavy", concurrency=4, queue_size=16, queue_timeout=2.0, rate=2.0, burst=10),
+    # bcrypt, ~50-100ms CPU po zahtevu
+    "auth": CostClass("auth", concurrency=2, queue_size=8, queue_timeout=3.0, rate=0.2, burst=5),
+}
+
+ROUTE_COSTS = {
+    ("GET", "/ideas/"): "heavy",
+    ("GET", "/ideas/filter-ideje/"): "heavy",
+    ("GET", "/users/"): "heavy",
+    ("GET", "/users/ideas/by-popular-creators"): "heavy",
+    ("GET", "/evaluations/getall/"): "heavy",
+    # POST /batch nema svoju klasu: svaka stavka prolazi kroz admit() kao zaseban zahtev
+    # (routers/batch.py), inace bi jedno heavy mesto pokretalo do BATCH_CONCURRENCY skupih citanja
+    ("POST", "/auth/login"): "auth",
+    ("POST", "/auth/register"): "auth",
+    ("POST", "/users/"): "auth",
+}
+
+MAX_CLIENTS = 10_000     # broj token bucket-a u memoriji (LRU)
+
+
+class TokenBuckets:
+    def __init__(self, maxsize: int = MAX_CLIENTS):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict = OrderedDict()
+
+    def take(self, key, rate: float, burst: int) -> float:
+        """0 ako je zahtev dozvoljen, inace broj sekundi do sledeceg tokena."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class Limiter:
+    """Semafor sa ogranicenim FIFO redom cekanja za jednu klasu."""
+
+    def __init__(self, cost: CostClass):
+        self.cost = cost
+        self.active = 0
+        self._waiters: deque = deque()
+        self.metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_rate": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "wait_seconds": 0.0,
+        }
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.active < self.cost.concurrency and not self._waiters:
+            self.active += 1
+            self.metrics["admitted"] += 1
+            return True
+        if len(self._waiters) >= self.cost.queue_size:
+            self.metrics["rejected_queue_full"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.metrics["queued"] += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.cost.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._waiters.remove(waiter)
+                self.metrics["rejected_timeout"] += 1
+                return False
+        except asyncio.CancelledError:
+            # klijent je otisao dok je cekao; ako je mesto vec predato, vrati ga
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            self.metrics["wait_seconds"] += time.monotonic() - start
+
+        # mesto je predato iz release(), active je vec uracunat
+        self.metrics["admitted"] += 1
+        return True
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "concurrency": self.cost.concurrency,
+            "queue_size": self.cost.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            **self.metrics,
+            "wait_seconds": round(self.metrics["wait_seconds"], 3),
+        }
+
+
+def client_key(scope, headers: Headers) -> str:
+    auth = headers.get("authorization", "")
+    if auth[:7].lower() == "bearer ":
+        try:
+            # potpis se proverava, inace bi klijent izmisljao sub i zaobisao limit
+            sub = jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            if sub:
+                return f"user:{sub}"
+        except JWTError:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class AdmissionController:
+    def __init__(self, classes: dict = COST_CLASSES, routes: dict = ROUTE_COSTS):
+        self.routes = routes
+        self.limiters = {name: Limiter(cost) for name, cost in classes.items()}
+        self.buckets = TokenBuckets()
+
+    def cost_of(self, method: str, path: str):
+        return self.routes.get((method, path))
+
+    async def admit(self, cost_name: str, client: str):
+        """
+        Token bucket pa semafor klase. None ako je zahtev primljen (pozivalac posle mora da
+        pozove release), inace (status, retry_after, detail) za odbijanje.
+        """
+        limiter = self.limiters[cost_name]
+        cost = limiter.cost
+        wait = self.buckets.take((cost_name, client), cost.rate, cost.burst)
+        if wait:
+            limiter.metrics["rejected_rate"] += 1
+            return 429, wait, "Previše zahteva, pokušaj ponovo kasnije"
+        if not await limiter.acquire():
+            return 503, cost.queue_timeout, "Server je trenutno preopterećen"
+        return None
+
+    def release(self, cost_name: str):
+        self.limiters[cost_name].release()
+
+    def snapshot(self) -> dict:
+        return {name: limiter.snapshot() for name, limiter in self.limiters.items()}
+
+
+admission = AdmissionController()
+
+
+async def _reject(send, status: int, retry_after: float, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cost_name = self.controller.cost_of(scope["method"], scope["path"])
+        if cost_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await self.controller.admit(cost_name, client_key(scope, Headers(scope=scope)))
+        if rejected:
+            await _reject(send, *rejected)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cost_name)
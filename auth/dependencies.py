@@ -1,7 +1,6 @@
 from fastapi import Depends, HTTPException
-from bson import ObjectId
 from fastapi.security import OAuth2PasswordBearer
-from database import users_col
+from repositories import get_repositories, memoize
 from auth.jwt_handler import ALGORITHM, SECRET_KEY
 from models import UserDB
 from jose import JWTError, jwt
@@ -9,6 +8,11 @@ from jose import JWTError, jwt
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserDB:
+    # u batch zahtevu svi pod-zahtevi dele jednu proveru tokena
+    return UserDB(**await memoize(("auth", token), lambda: _load_user(token)))
+
+
+async def _load_user(token: str) -> dict:
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -22,13 +26,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserDB:
     except JWTError:
         raise credentials_exception
 
-    user = await users_col.find_one({"_id": ObjectId(user_id)})
+    user = await get_repositories().users.get(user_id)
     if user is None:
         raise credentials_exception
 
-    # Ručno konvertuj ObjectId u string pre nego što kreiraš UserDB
-    user["_id"] = str(user["_id"])
-    return UserDB(**user)
+    return user
 
 def decode_access_token(token: str) -> dict:
     try:
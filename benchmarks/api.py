@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from auth.jwt_handler import create_access_token
+from benchmarks.client import request
+from repositories import create_repositories, set_repositories
+
+# Merenje API-ja u istom procesu, bez HTTP servera.
+#   python -m benchmarks.api                   -> in-memory backend, samo Python trosak
+#   python -m benchmarks.api --backend mongo   -> isto nad mongod-om (baza doc-backend-bench)
+# Razlika izmedju dva pokretanja je trosak baze.
+
+BENCH_DB = "doc-backend-bench"
+# hash se nikad ne proverava u benchmarku, bcrypt bi samo usporio seed
+PASSWORD_HASH = "$2b$12$" + "x" * 53
+
+
+async def seed(repos, users: int, ideas_per_user: int, evaluations: int, follows_per_user: int, rnd: random.Random):
+    user_ids, usernames = [], []
+    for i in range(users):
+        username = f"user{i}"
+        user_id = await repos.users.insert({
+            "username": username,
+            "email": f"{username}@bench.local",
+            "password": PASSWORD_HASH,
+            "title": "Software Developer",
+            "description": "Bench korisnik",
+            "location": "Novi Sad, Srbija",
+            "skills": ["python", "mongodb"],
+            "role": "user",
+            "followers": [],
+            "following": [],
+        })
+        user_ids.append(user_id)
+        usernames.append(username)
+
+    for follower in usernames:
+        for followee in rnd.sample(usernames, min(follows_per_user, users)):
+            if followee != follower:
+                await repos.users.follow(follower, followee)
+
+    idea_ids = []
+    for user_id in user_ids:
+        for j in range(ideas_per_user):
+            idea_ids.append(await repos.ideas.insert({
+                "title": f"Ideja {j}",
+                "description": "Opis ideje " * 20,
+                "market": rnd.choice(["fintech", "edtech", "health", "retail"]),
+                "target_audience": rnd.choice(["studenti", "firme", "penzioneri"]),
+                "created_at": datetime.utcnow() - timedelta(minutes=rnd.randint(0, 60 * 24 * 30)),
+                "created_by": user_id,
+            }))
+
+    evaluated = []   # ideje koje imaju bar jednu ocenu, redom kojim su prvi put ocenjene
+    for _ in range(evaluations):
+        idea_id = rnd.choice(idea_ids)
+        before, after = await repos.evaluations.upsert(idea_id, rnd.choice(user_ids), {
+            "score": rnd.randint(1, 5),
+            "liked": rnd.random() < 0.5,
+            "comment": "Odlicno!",
+        })
+        if idea_id not in evaluated:
+            evaluated.append(idea_id)
+        if bool(before and before.get("liked")) != after["liked"]:
+            await repos.ideas.inc_like_count(idea_id, 1 if after["liked"] else -1)
+
+    return user_ids, usernames, idea_ids, evaluated
+
+
+async def measure(app, method: str, path: str, headers: dict, iterations: int) -> list[float]:
+    for _ in range(5):
+        status, body = await request(app, method, path, headers)
+        if status != 200:
+            raise RuntimeError(f"{method} {path} -> {status}: {body[:200]!r}")
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await request(app, method, path, headers)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run(args):
+    if args.backend == "mongo":
+        from database import get_client
+        from repositories.mongo import create_mongo_repositories
+
+        client = get_client()
+        await client.drop_database(BENCH_DB)
+        repos = create_mongo_repositories(client[BENCH_DB])
+    else:
+        repos = create_repositories("memory")
+    set_repositories(repos)
+
+    from main import app
+    from admission import admission
+
+    # meri se endpoint, a ne odbijanje: bez admission kontrole za sve rute
+    admission.routes = {}
+
+    rnd = random.Random(args.seed)
+    user_ids, usernames, idea_ids, evaluated = await seed(
+        repos, args.users, args.ideas_per_user, args.evaluations, args.follows_per_user, rnd
+    )
+    token = create_access_token(data={"sub": user_ids[0]})
+    # no-cache: meri se endpoint, a ne kes kompresovanih odgovora
+    headers = {"cache-control": "no-cache"}
+    auth_headers = {**headers, "authorization": f"Bearer {token}"}
+
+    # /evaluations/vratisveocene vraca 404 za ideju bez ocena, pa se meri prva ocenjena
+    username, idea_id = usernames[0], (evaluated or idea_ids)[0]
+    scenarios = [
+        ("GET", "/ideas/", headers),
+        ("GET", "/ideas/?fields=title", headers),
+        ("GET", f"/ideas/{idea_id}", headers),
+        ("GET", "/users/", headers),
+        ("GET", "/users/me", auth_headers),
+        ("GET", f"/users/followers/{username}", headers),
+        ("GET", f"/users/user-info/by-username/{username}", headers),
+        ("GET", "/users/ideas/by-popular-creators", headers),
+        ("GET", f"/evaluations/likes/count/{idea_id}", headers),
+        ("GET", f"/ideas/{idea_id}/comments", headers),
+        ("GET", "/ideas/filter-ideje/", headers),
+        ("GET", "/ideas/facets", headers),
+        ("GET", "/ideas/facets?min_likes=1", headers),
+        ("GET", "/ideas/browse?market=fintech", headers),
+        ("GET", "/ideas/browse?sort=likes&limit=50", headers),
+    ]
+    if evaluated:
+        # bez ocena oba endpointa vracaju 404
+        scenarios += [
+            ("GET", "/evaluations/getall/", headers),
+            ("GET", f"/evaluations/vratisveocene/{idea_id}", headers),
+        ]
+
+    print(f"backend={args.backend} users={args.users} ideas={len(idea_ids)} evaluations={args.evaluations}")
+    print(f"{'endpoint':<48} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'req/s':>10}")
+    for method, path, hdrs in scenarios:
+        timings = await measure(app, method, path, hdrs, args.iterations)
+        timings.sort()
+        mean = statistics.fmean(timings)
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{method + ' ' + path:<48.48} {mean * 1e6:>10.0f} {p50 * 1e6:>10.0f} {p99 * 1e6:>10.0f} {1 / mean:>10.0f}")
+
+    if args.backend == "mongo":
+        await client.drop_database(BENCH_DB)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.api")
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--ideas-per-user", type=int, default=5)
+    parser.add_argument("--evaluations", type=int, default=2000)
+    parser.add_argument("--follows-per-user", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
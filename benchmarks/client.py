@@ -0,0 +1,65 @@
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import unquote
+
+# Minimalni ASGI klijent: zove aplikaciju direktno u istom procesu, bez mreze i servera.
+
+
+async def call(app, method: str, path: str, headers: dict | None = None, body: bytes = b"") -> dict:
+    """Ceo odgovor: {"status", "headers" (imena malim slovima), "body"}."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": unquote(path),   # kao uvicorn: dekodiran path, raw_path kako je poslat
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"status": None, "headers": {}, "body": b""}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
+
+
+async def request(app, method: str, path: str, headers: dict | None = None, body: bytes = b""):
+    response = await call(app, method, path, headers, body)
+    return response["status"], response["body"]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Pokrece ASGI lifespan (startup pa shutdown) kao uvicorn."""
+    inbox: asyncio.Queue = asyncio.Queue()
+    outbox: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, inbox.get, outbox.put))
+
+    await inbox.put({"type": "lifespan.startup"})
+    message = await outbox.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Startup nije uspeo: {message.get('message')}")
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Hladan start, svaki put u novom procesu:
+#   python -m benchmarks.startup                    -> in-memory backend
+#   python -m benchmarks.startup --backend mongo    -> sa mongod-om (MONGO_URI iz settings.py)
+# Faze: import main -> lifespan startup (konekcije, indeksi, OpenAPI) -> prvi i drugi zahtev.
+# Brojevi se porede izmedju verzija; razlika prvi/drugi zahtev je ono sto lifespan nije zagrejao.
+
+PATHS = ("/ideas/", "/users/")
+
+
+async def _child(paths) -> dict:
+    start = time.perf_counter()
+    from main import app
+    from benchmarks.client import lifespan, request
+    imported = time.perf_counter()
+
+    timings = {"import": imported - start}
+    async with lifespan(app):
+        ready = time.perf_counter()
+        timings["startup"] = ready - imported
+        for path in paths:
+            t = time.perf_counter()
+            await request(app, "GET", path, {"cache-control": "no-cache"})
+            first = time.perf_counter() - t
+            t = time.perf_counter()
+            await request(app, "GET", path, {"cache-control": "no-cache"})
+            timings[f"first {path}"] = first
+            timings[f"second {path}"] = time.perf_counter() - t
+        timings["import_to_ready"] = ready - start
+    timings["shutdown"] = time.perf_counter() - ready - sum(
+        v for k, v in timings.items() if k.startswith(("first", "second"))
+    )
+    return timings
+
+
+def run_once(backend: str) -> dict:
+    env = dict(os.environ, REPOSITORY_BACKEND=backend)
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    # ukljucuje i pokretanje interpretera
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_child(PATHS))))
+        return
+
+    runs = [run_once(args.backend) for _ in range(args.runs)]
+    print(f"backend={args.backend} runs={args.runs}")
+    print(f"{'faza':<28} {'median ms':>10} {'max ms':>10}")
+    for key in runs[0]:
+        values = [r[key] * 1000 for r in runs]
+        print(f"{key:<28} {statistics.median(values):>10.1f} {max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
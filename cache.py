@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from database import get_db
+
+# Koherencija lokalnih keseva izmedju uvicorn workera.
+# Svaki worker prati MongoDB change stream na users/ideas/evaluations i brise svoje
+# kesirane unose cim se promeni dokument od kog zavise. Unosi su oznaceni tagovima
+# (kolekcija, id); (kolekcija, "*") znaci "bilo koja promena u kolekciji".
+# Ako change stream nije dostupan (standalone mongod), kesevi rade sa kratkim TTL-om.
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ("users", "ideas", "evaluations")
+COHERENT_TTL = 300.0     # sekunde, dok change stream radi
+FALLBACK_TTL = 5.0       # sekunde, bez change streama
+RETRY_INTERVAL = 5.0
+TOKEN_SAVE_INTERVAL = 1.0
+RESUME_TOKEN_ID = "change_stream"
+
+# promena dokumenta invalidira i dokumente na koje on pokazuje
+REFERENCES = {
+    "ideas": (("created_by", "users"),),
+    "evaluations": (("idea_id", "ideas"),),
+    "comments": (("idea_id", "ideas"),),
+}
+
+_listeners = []
+_coherent = False
+
+
+def is_coherent() -> bool:
+    return _coherent
+
+
+def current_ttl() -> float:
+    return COHERENT_TTL if _coherent else FALLBACK_TTL
+
+
+def subscribe(listener):
+    """listener(tags: set[tuple[str, str]]) se poziva za svaku promenu."""
+    _listeners.append(listener)
+    return listener
+
+
+def change_tags(collection: str, doc_id, doc: dict | None = None) -> set:
+    tags = {(collection, "*")}
+    if doc_id is not None:
+        tags.add((collection, str(doc_id)))
+    for field, target in REFERENCES.get(collection, ()):
+        if doc and doc.get(field) is not None:
+            tags.add((target, str(doc[field])))
+    return tags
+
+
+def publish_change(collection: str, doc_id=None, doc: dict | None = None):
+    """
+    Javlja svim kesevima u ovom workeru da se dokument promenio.
+    Poziva se posle lokalnog upisa (odmah vidljivo) i iz change streama (ostali workeri).
+    """
+    tags = change_tags(collection, doc_id, doc)
+    for listener in _listeners:
+        listener(tags)
+
+
+def clear_all():
+    for listener in _listeners:
+        listener(None)
+
+
+class LocalCache:
+    """LRU + TTL kes u memoriji workera, sa invalidacijom po tagovima."""
+
+    def __init__(self, name: str, maxsize: int = 1024):
+        self.name = name
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._by_tag: dict[tuple, set] = {}
+        subscribe(self.invalidate)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, stored_at, _ = entry
+        if time.monotonic() - stored_at > current_ttl():
+            self._drop(key)
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, tags=()):
+        self._drop(key)
+        tags = frozenset(tags)
+        self._entries[key] = (value, time.monotonic(), tags)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def invalidate(self, tags):
+        if tags is None:
+            self.clear()
+            return
+        for tag in tags:
+            for key in list(self._by_tag.get(tag, ())):
+                self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_tag.clear()
+
+
+def set_coherent(value: bool):
+    global _coherent
+    if value != _coherent:
+        _coherent = value
+        # dok stream nije radio, mogli smo propustiti promene
+        clear_all()
+
+
+def _handle(change: dict):
+    op = change["operationType"]
+    if op in ("insert", "update", "replace", "delete"):
+        publish_change(change["ns"]["coll"], change["documentKey"]["_id"], change.get("fullDocument"))
+    else:
+        # drop, rename, dropDatabase, invalidate...
+        clear_all()
+
+
+async def _load_resume_token():
+    doc = await get_db()["cache_state"].find_one({"_id": RESUME_TOKEN_ID})
+    return doc["token"] if doc else None
+
+
+async def _save_resume_token(token):
+    await get_db()["cache_state"].update_one(
+        {"_id": RESUME_TOKEN_ID},
+        {"$set": {"token": token}},
+        upsert=True
+    )
+
+
+async def watch_changes():
+    """Pozadinski task: prati change stream i invalidira lokalne keseve."""
+    pipeline = [{"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}}]
+    resume_token = await _load_resume_token()
+
+    while True:
+        try:
+            async with get_db().watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                set_coherent(True)
+                last_saved = time.monotonic()
+                async for change in stream:
+                    _handle(change)
+                    resume_token = stream.resume_token
+                    if time.monotonic() - last_saved > TOKEN_SAVE_INTERVAL:
+                        await _save_resume_token(resume_token)
+                        last_saved = time.monotonic()
+        except asyncio.CancelledError:
+            if resume_token is not None:
+                await asyncio.shield(_save_resume_token(resume_token))
+            raise
+        except OperationFailure as e:
+            set_coherent(False)
+            if e.code == 40573 or "replica set" in str(e):
+                # standalone mongod nema change stream -> ostaje kratak TTL
+                logger.warning("Change streams nisu dostupni, kes radi sa TTL=%ss", FALLBACK_TTL)
+                return
+            if e.code in (260, 280, 286):
+                # token vise nije u oplogu, krecemo od sada
+                resume_token = None
+            logger.warning("Change stream greska: %s", e)
+            await asyncio.sleep(RETRY_INTERVAL)
+        except PyMongoError as e:
+            set_coherent(False)
+            logger.warning("Change stream prekinut: %s", e)
+            await asyncio.sleep(RETRY_INTERVAL)
+
+
+async def self_check(timeout: float = 10.0) -> bool:
+    """
+    Provera na lokalnom single-node replica setu:
+        mongod --replSet rs0  +  mongosh --eval "rs.initiate()"
+        python cache.py
+    Upisuje i brise privremenu ideju i ceka da kes dobije invalidaciju iz change streama.
+    """
+    cache = LocalCache("self-check")
+    watcher = asyncio.create_task(watch_changes())
+    try:
+        deadline = time.monotonic() + timeout
+        while not is_coherent():
+            if watcher.done() or time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.1)
+
+        cache.set("probe", True, tags=[("ideas", "*")])
+        ideas = get_db()["ideas"]
+        res = await ideas.insert_one({"title": "__cache_self_check__"})
+        await ideas.delete_one({"_id": res.inserted_id})
+
+        while cache.get("probe") is not None:
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+    finally:
+        watcher.cancel()
+
+
+if __name__ == "__main__":
+    ok = asyncio.run(self_check())
+    print("change stream invalidacija radi" if ok else "change stream invalidacija NE radi")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,100 @@
+import base64
+from datetime import datetime
+
+from bson import ObjectId
+
+from notifications import emit
+from cache import publish_change
+from repositories import get_repositories
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        created_at, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(comment_id)
+    except Exception:
+        raise ValueError("Nevalidan cursor")
+
+
+async def list_comments(idea_id: str, parent_id: str | None = None, cursor: str | None = None,
+                        limit: int = PAGE_SIZE) -> tuple[list[dict], str | None]:
+    """
+    Jedna strana komentara ideje (ili odgovora na komentar), hronoloski.
+    Cita se samo `limit + 1` dokumenata preko indeksa, bez obzira na ukupan broj komentara.
+    """
+    repos = get_repositories()
+    after = None
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        after = (created_at, str(last_id))
+
+    docs = await repos.comments.page(idea_id, parent_id, after, limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1])
+
+    names = await repos.users.usernames_by_ids(d["user_id"] for d in docs)
+    for doc in docs:
+        doc["username"] = names.get(doc["user_id"], "Nepoznat korisnik")
+    return docs, next_cursor
+
+
+async def _notify(idea: dict, actor: str, comment: dict, parent: dict | None = None):
+    recipients = [idea["created_by"]]
+    if parent:
+        recipients.append(parent["user_id"])
+    names = await get_repositories().users.usernames_by_ids(recipients)
+    await emit(
+        "comment",
+        names.values(),
+        actor=actor,
+        idea_id=comment["idea_id"],
+        idea_title=idea.get("title"),
+        comment_id=comment["_id"],
+        text=comment["text"],
+    )
+
+
+async def add_comment(idea: dict, user: dict, text: str, parent: dict | None = None) -> dict:
+    repos = get_repositories()
+    doc = {
+        "idea_id": idea["_id"],
+        "user_id": user["_id"],
+        "text": text,
+        "parent_id": parent["_id"] if parent else None,
+        "reply_count": 0,
+        "created_at": datetime.utcnow(),
+    }
+    doc["_id"] = await repos.comments.insert(doc)
+
+    # denormalizovani brojaci, da lista ideja ne broji komentare
+    await repos.ideas.inc_comment_count(idea["_id"])
+    publish_change("ideas", idea["_id"], idea)
+    if parent:
+        await repos.comments.inc_reply_count(parent["_id"])
+
+    await _notify(idea, user["username"], doc, parent)
+    doc["username"] = user["username"]
+    return doc
+
+
+async def upsert_evaluation_comment(evaluation: dict):
+    """
+    Komentar iz evaluacije (Evaluation.comment) se cuva i kao komentar najviseg nivoa.
+    Jedna evaluacija = jedan komentar, ponovna evaluacija samo menja tekst.
+    """
+    repos = get_repositories()
+    created_at = evaluation.get("created_at") or ObjectId(evaluation["_id"]).generation_time.replace(tzinfo=None)
+    if await repos.comments.upsert_for_evaluation(evaluation, created_at):
+        await repos.ideas.inc_comment_count(evaluation["idea_id"])
+        publish_change("ideas", evaluation["idea_id"])
@@ -0,0 +1,268 @@
+import gzip
+import hashlib
+import time
+import zlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from cache import current_ttl, subscribe
+
+try:
+    import zstandard
+except ImportError:  # zstd je opcion, bez paketa radi samo gzip
+    zstandard = None
+
+MINIMUM_SIZE = 1024      # manji odgovori se ne kompresuju
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+CACHE_SIZE = 64          # broj kesiranih (putanja, query, encoding) odgovora
+
+# javne liste koje ne zavise od ulogovanog korisnika -> kolekcije od kojih zavise
+CACHEABLE_PATHS = {
+    "/ideas/": {"ideas", "users"},
+    "/users/": {"users"},
+    "/users/ideas/by-popular-creators": {"ideas", "users"},
+    "/evaluations/getall/": {"evaluations"},
+}
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Bira zstd ili gzip iz Accept-Encoding headera (poštuje q=0)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    wildcard = accepted.get("*", 0.0)
+    if zstandard is not None and accepted.get("zstd", wildcard) > 0:
+        return "zstd"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip header
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        # flush posle svakog chunka da klijent dobije podatke odmah
+        return self._obj.compress(data) + self._obj.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class ResponseCache:
+    """
+    Mali LRU vec kompresovanih odgovora, kljuc (putanja, query, encoding).
+    Unos se brise cim se promeni kolekcija od koje putanja zavisi (vidi cache.py).
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE, paths: dict = CACHEABLE_PATHS):
+        self.maxsize = maxsize
+        self.paths = paths
+        self._entries: OrderedDict = OrderedDict()
+        subscribe(self.invalidate)
+
+    def get(self, key, fresh_only: bool = True):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if fresh_only and time.monotonic() - entry["stored_at"] > current_ttl():
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: dict):
+        entry["stored_at"] = time.monotonic()
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, tags):
+        if tags is None:
+            self.clear()
+            return
+        changed = {collection for collection, _ in tags}
+        for key in list(self._entries):
+            if self.paths.get(key[0], set()) & changed:
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+class CompressionMiddleware:
+    """
+    gzip/zstd kompresija odgovora. Za GET na CACHEABLE_PATHS cuva kompresovano telo
+    sa ETag-om: dok je sveze ne poziva se endpoint (nema ni serijalizacije ni kompresije),
+    a kad istekne i endpoint vrati isto telo (isti ETag), kompresija se preskace.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE, cache: ResponseCache = response_cache,
+                 cacheable_paths=CACHEABLE_PATHS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache
+        self.cacheable_paths = cacheable_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+        if_none_match = request_headers.get("if-none-match")
+        cacheable = scope["method"] == "GET" and scope["path"] in self.cacheable_paths
+        key = (scope["path"], scope["query_string"], encoding)
+
+        # Cache-Control: no-cache -> klijent trazi sveze, endpoint se uvek poziva
+        if cacheable and "no-cache" not in request_headers.get("cache-control", ""):
+            entry = self.cache.get(key)
+            if entry is not None:
+                await self._send_entry(send, entry, if_none_match)
+                return
+
+        responder = _Responder(self, send, encoding, key if cacheable else None, if_none_match)
+        await self.app(scope, receive, responder)
+
+    async def _send_entry(self, send, entry: dict, if_none_match: str | None):
+        if if_none_match and entry["etag"] in if_none_match:
+            await send({"type": "http.response.start", "status": 304,
+                        "headers": [(b"etag", entry["etag"].encode()), (b"vary", b"Accept-Encoding")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry["status"], "headers": entry["headers"]})
+        await send({"type": "http.response.body", "body": entry["body"]})
+
+
+class _Responder:
+    def __init__(self, middleware: CompressionMiddleware, send, encoding, cache_key, if_none_match):
+        self.mw = middleware
+        self.send = send
+        self.encoding = encoding
+        self.cache_key = cache_key
+        self.if_none_match = if_none_match
+        self.start_message = None
+        self.streamer: StreamCompressor | None = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            # vec kodirano ili nesto sto ne zelimo da diramo
+            self.passthrough = "content-encoding" in headers
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        if self.streamer is not None:
+            await self._stream(message)
+            return
+
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            # chunked odgovor: kompresuj u hodu ako klijent podrzava
+            if self.encoding is None:
+                self.passthrough = True
+            else:
+                self.streamer = StreamCompressor(self.encoding)
+                headers = MutableHeaders(raw=self.start_message["headers"])
+                del headers["content-length"]
+                headers["content-encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+            await self.send(self.start_message)
+            self.start_message = None
+            if self.streamer is not None:
+                await self._stream(message)
+            else:
+                await self.send(message)
+            return
+
+        await self._send_whole(body)
+
+    async def _stream(self, message):
+        data = self.streamer.chunk(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            data += self.streamer.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_whole(self, body: bytes):
+        start = self.start_message
+        status = start["status"]
+        headers = MutableHeaders(raw=start["headers"])
+        cacheable = (
+            self.cache_key is not None
+            and status == 200
+            and "set-cookie" not in headers
+            and "no-store" not in headers.get("cache-control", "")
+        )
+
+        etag = None
+        if cacheable:
+            etag = 'W/"' + hashlib.sha1(body).hexdigest() + '"'
+            headers["etag"] = etag
+
+        encoded = body
+        if self.encoding is not None and len(body) >= self.mw.minimum_size:
+            previous = self.mw.cache.get(self.cache_key, fresh_only=False) if cacheable else None
+            if previous is not None and previous["etag"] == etag:
+                encoded = previous["body"]  # isto telo kao ranije -> bez ponovne kompresije
+            else:
+                encoded = compress(body, self.encoding)
+            headers["content-encoding"] = self.encoding
+            headers["content-length"] = str(len(encoded))
+            headers.add_vary_header("Accept-Encoding")
+
+        if cacheable:
+            self.mw.cache.put(self.cache_key, {
+                "status": status,
+                "headers": list(start["headers"]),
+                "body": encoded,
+                "etag": etag,
+            })
+            if self.if_none_match and etag in self.if_none_match:
+                await self.mw._send_entry(self.send, {"etag": etag}, self.if_none_match)
+                return
+
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": encoded})
@@ -1,10 +1,102 @@
+import asyncio
+
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
 
-MONGO_URI = "mongodb://localhost:27017"
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["doc-backend"]
+from settings import Settings, get_settings
+
+# Klijent se pravi iz settings.py. U aplikaciji ga otvara i zatvara lifespan (connect/close);
+# skripte (migracije, cache.py, benchmark) ga dobijaju lenjo preko get_client()/get_db().
+_client: AsyncIOMotorClient | None = None
+
+
+def create_client(settings: Settings) -> AsyncIOMotorClient:
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+    }
+    if settings.mongo_max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.mongo_max_idle_time_ms
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    return AsyncIOMotorClient(settings.mongo_uri, **options)
+
+
+def get_client() -> AsyncIOMotorClient:
+    global _client
+    if _client is None:
+        _client = create_client(get_settings())
+    return _client
+
+
+def get_db():
+    return get_client()[get_settings().mongo_db]
+
+
+async def connect(warmup_connections: int | None = None) -> AsyncIOMotorClient:
+    """
+    Pravi klijent i otvara konekcije unapred: paralelni ping-ovi teraju pool da otvori
+    toliko konekcija (TCP + TLS + handshake), pa ih prvi zahtevi ne placaju.
+    """
+    client = get_client()
+    if warmup_connections is None:
+        warmup_connections = get_settings().mongo_warmup_connections
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(1, warmup_connections))))
+    return client
+
+
+def close():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+# Reference (created_by, idea_id, user_id, parent_id) su ranije cuvane kao hex stringovi.
+# Migracija 0001 (python -m migrations up) ih prebacuje u ObjectId. Redosled:
+#   1. deploy sa citanjem oba oblika (ref_match) i upisom stringova
+#   2. python -m migrations up
+#   3. MONGO_WRITE_OBJECTID_REFS=true u environment-u i restart, bez novog deploy-a
+
+
+def ref(value):
+    """Vrednost reference za upis u bazu."""
+    if value is None:
+        return None
+    return ObjectId(value) if get_settings().mongo_write_objectid_refs else str(value)
+
+
+def ref_match(value):
+    """Filter koji pogadja referencu bilo da je sacuvana kao string ili kao ObjectId."""
+    if value is None:
+        return None
+    value = str(value)
+    if not ObjectId.is_valid(value):
+        return value
+    return {"$in": [ObjectId(value), value]}
+
 
-# kolekcije
-users_col = db["users"]
-ideas_col = db["ideas"]
-evaluations_col = db["evaluations"]
+async def ensure_indexes():
+    db = get_db()
+    await db["ideas"].create_index("created_by")
+    # /ideas/browse: jednakost po facet polju pa sort, _id razbija jednakost
+    await db["ideas"].create_index([("created_at", -1), ("_id", -1)])
+    await db["ideas"].create_index([("like_count", -1), ("_id", -1)])
+    await db["ideas"].create_index([("market", 1), ("created_at", -1), ("_id", -1)])
+    await db["ideas"].create_index([("target_audience", 1), ("created_at", -1), ("_id", -1)])
+    await db["ideas"].create_index([("market", 1), ("like_count", -1), ("_id", -1)])
+    await db["ideas"].create_index([("target_audience", 1), ("like_count", -1), ("_id", -1)])
+    await db["evaluations"].create_index([("idea_id", 1), ("user_id", 1)])
+    # notifications = outbox + sacuvane notifikacije
+    # dispatcher trazi neisporucene redove za povezane korisnike
+    await db["notifications"].create_index([("recipient", 1), ("delivered", 1), ("_id", 1)])
+    await db["notifications"].create_index([("recipient", 1), ("created_at", -1)])
+    # stranicenje komentara: (idea_id, parent_id) pa hronoloski, _id razbija jednakost
+    await db["comments"].create_index([("idea_id", 1), ("parent_id", 1), ("created_at", 1), ("_id", 1)])
+    await db["comments"].create_index("evaluation_id", unique=True, sparse=True)
+    # follows = log pracenja sa created_at; activity (_id = "YYYY-MM-DD") ima dovoljan _id indeks
+    await db["follows"].create_index([("follower", 1), ("followee", 1)], unique=True)
+    await db["follows"].create_index("followee")
@@ -0,0 +1,69 @@
+import base64
+from datetime import datetime
+
+from bson import ObjectId
+
+from cache import LocalCache
+from repositories import get_repositories
+from repositories.base import BROWSE_SORTS
+
+# Pregled ideja po market / target_audience.
+# Brojevi bez filtera dolaze iz brojaca (kolekcija idea_facets) koje azuriraju
+# kreiranje, izmena i brisanje ideje; sa filterima ide jedna $facet agregacija.
+# Oba rezultata se kesiraju dok se ne promeni neka ideja (vidi cache.py).
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+FACET_CACHE_SIZE = 256
+
+facet_cache = LocalCache("idea-facets", maxsize=FACET_CACHE_SIZE)
+
+
+def clean_filters(**filters) -> dict:
+    # None i min_likes=0 ne filtriraju nista, ne treba da prave poseban kljuc u kesu
+    return {k: v for k, v in filters.items() if v}
+
+
+async def idea_facets(filters: dict) -> dict:
+    key = tuple(sorted(filters.items()))
+    result = facet_cache.get(key)
+    if result is not None:
+        return result
+
+    ideas = get_repositories().ideas
+    result = await ideas.facets(filters) if filters else await ideas.facet_totals()
+    facet_cache.set(key, result, tags=[("ideas", "*")])
+    return result
+
+
+def encode_cursor(doc: dict, sort: str) -> str:
+    value = doc.get(BROWSE_SORTS[sort])
+    value = value.isoformat() if isinstance(value, datetime) else int(value or 0)
+    raw = f"{sort}|{value}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        cursor_sort, value, idea_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if cursor_sort != sort or not ObjectId.is_valid(idea_id):
+            raise ValueError
+        return (datetime.fromisoformat(value) if sort == "new" else int(value)), idea_id
+    except Exception:
+        raise ValueError("Nevalidan cursor")
+
+
+async def browse_ideas(filters: dict, sort: str = "new", cursor: str | None = None,
+                       limit: int = PAGE_SIZE, projection: dict | None = None) -> tuple[list[dict], str | None]:
+    """Strana filtriranih ideja; cita se `limit + 1` dokumenata preko indeksa."""
+    after = decode_cursor(cursor, sort) if cursor else None
+    if projection is not None:
+        projection = {**projection, "_id": 1, BROWSE_SORTS[sort]: 1}
+
+    docs = await get_repositories().ideas.browse(filters, sort, after, limit + 1, projection)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort)
+    return docs, next_cursor
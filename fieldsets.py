@@ -0,0 +1,71 @@
+from functools import lru_cache
+from typing import Iterable
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, create_model
+
+# ?fields=title,created_at -> Mongo projekcija + skraceni response model.
+# Polja koja nisu trazena se uopste ne citaju iz baze.
+
+
+@lru_cache(maxsize=256)
+def trimmed_model(model: type[BaseModel], names: frozenset) -> type[BaseModel]:
+    definitions = {
+        name: (field.annotation, field)
+        for name, field in model.model_fields.items()
+        if name in names
+    }
+    return create_model(f"{model.__name__}Fields", __config__=model.model_config, **definitions)
+
+
+class FieldSelection:
+    def __init__(self, model: type[BaseModel], names: frozenset):
+        self.names = names
+        self.model = trimmed_model(model, names)
+        # kljuc u bazi je alias ako postoji (id -> _id)
+        self.projection = {
+            (field.alias or name): 1
+            for name, field in model.model_fields.items()
+            if name in names
+        }
+        if "_id" not in self.projection:
+            self.projection["_id"] = 0
+
+    def wants(self, name: str) -> bool:
+        return name in self.names
+
+    def with_db_fields(self, *keys: str) -> dict:
+        # dodatna polja koja trebaju endpointu (npr. created_by za author_username)
+        return {**self.projection, **{k: 1 for k in keys}}
+
+    def dump(self, doc: dict) -> dict:
+        return self.model(**doc).model_dump(mode="json", by_alias=True)
+
+
+def field_selection(model: type[BaseModel], exclude: Iterable[str] = (), always: Iterable[str] = ("id",)):
+    """
+    Pravi FastAPI dependency za `fields` query parametar nad datim response modelom.
+    Bez parametra vraca sva polja modela osim `exclude`.
+    """
+    allowed = frozenset(model.model_fields)
+    always = frozenset(always) & allowed
+    # podrazumevana selekcija (bez ?fields=) se pravi odmah, pri uvozu routera
+    default = FieldSelection(model, allowed - frozenset(exclude))
+
+    # async: FastAPI bi sync dependency slao u threadpool
+    async def dependency(
+        fields: str | None = Query(
+            None,
+            description=f"Polja odvojena zarezom. Dozvoljena: {', '.join(sorted(allowed))}",
+        )
+    ) -> FieldSelection:
+        if not fields:
+            return default
+
+        requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+        unknown = requested - allowed
+        if unknown:
+            raise HTTPException(400, f"Nepoznata polja: {', '.join(sorted(unknown))}")
+        return FieldSelection(model, requested | always)
+
+    return dependency
@@ -1,12 +1,67 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from routers import auth, ideas, users, evaluations
+from routers import auth, ideas, users, evaluations, notifications, comments, batch, admin
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from database import close, connect, ensure_indexes
+from notifications import dispatcher
+from compression import CompressionMiddleware
+from admission import AdmissionMiddleware
+from cache import set_coherent, watch_changes
+from repositories import get_repositories, set_repositories
 
+logger = logging.getLogger(__name__)
 
+# koliko se pri gasenju ceka da pozadinski taskovi obrade cancel
+SHUTDOWN_TIMEOUT = 5.0
 
-app = FastAPI(title="Document backend project")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    backend = get_repositories().backend
+    tasks = []
+    if backend == "mongo":
+        # konekcije (ping) i indeksi pre prvog zahteva, ne na prvim zahtevima posle deploy-a
+        await connect()
+        await ensure_indexes()
+        tasks.append(asyncio.create_task(watch_changes()))
+    else:
+        # jedan proces, svi upisi vec zovu publish_change
+        set_coherent(True)
+    tasks.append(asyncio.create_task(dispatcher()))
+
+    # OpenAPI sema (i pydantic JSON seme svih modela) odmah, a ne na prvom /docs zahtevu
+    app.openapi()
+    # threadpool (bcrypt) se inace pokrece na prvom zahtevu koji ga koristi
+    await run_in_threadpool(lambda: None)
+    yield
+
+    for task in tasks:
+        task.cancel()
+    # sacekaj taskove (watch_changes cuva resume token) pa tek onda zatvori klijent;
+    # task koji ignorise cancel ne sme zauvek da blokira gasenje procesa
+    done, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT)
+    for task in done:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Pozadinski task %s je pao: %r", task.get_coro().__qualname__, task.exception())
+    for task in pending:
+        logger.warning("Pozadinski task %s se nije zaustavio za %.0fs", task.get_coro().__qualname__, SHUTDOWN_TIMEOUT)
+    if backend == "mongo":
+        close()
+        # repozitorijumi drze kolekcije zatvorenog klijenta, sledeci start pravi nove
+        set_repositories(None)
+
+
+app = FastAPI(title="Document backend project", lifespan=lifespan)
+
+# poslednji dodat je spoljni: CORS -> kes kompresovanih odgovora -> admission -> app.
+# CORS je spolja da bi i kesirani odgovori i 429/503 dobili CORS headere za svaki Origin
+# (kes ne razlikuje Origin), a kes je ispred admission kontrole pa se pogoci ne ogranicavaju.
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # ili ["http://localhost:3000"]
@@ -18,4 +73,9 @@ app.add_middleware(
 app.include_router(users.router)
 app.include_router(ideas.router)
 app.include_router(evaluations.router)
-app.include_router(auth.router)
\ No newline at end of file
+app.include_router(comments.router)
+app.include_router(auth.router)
+app.include_router(notifications.router)
+app.include_router(notifications.ws_router)
+app.include_router(batch.router)
+app.include_router(admin.router)
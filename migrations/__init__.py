@@ -0,0 +1,9 @@
+from migrations import m0001_objectid_refs, m0002_idea_facets, m0003_activity_rollups, m0004_evaluation_comments
+
+# redosled je bitan, nove migracije se dodaju na kraj
+MIGRATIONS = [
+    m0001_objectid_refs,
+    m0002_idea_facets,
+    m0003_activity_rollups,
+    m0004_evaluation_comments,
+]
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+from datetime import datetime
+
+from database import get_db
+from migrations import MIGRATIONS
+
+# python -m migrations status
+# python -m migrations up [--batch-size 1000]
+# python -m migrations sizes
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _migrations_col():
+    return get_db()["schema_migrations"]
+
+
+class Checkpoint:
+    """Cuva poslednji obradjeni _id po kolekciji u schema_migrations dokumentu."""
+
+    def __init__(self, migration_id: str):
+        self.migration_id = migration_id
+
+    async def get(self, collection: str):
+        doc = await _migrations_col().find_one({"_id": self.migration_id}, {"checkpoints": 1})
+        return (doc or {}).get("checkpoints", {}).get(collection)
+
+    async def set(self, collection: str, last_id):
+        await _migrations_col().update_one(
+            {"_id": self.migration_id},
+            {"$set": {f"checkpoints.{collection}": last_id}}
+        )
+
+
+def migration_id(migration) -> str:
+    return f"{migration.VERSION}_{migration.NAME}"
+
+
+async def collection_sizes(collections) -> dict:
+    sizes = {}
+    for name in collections:
+        stats = await get_db()[name].aggregate([{"$collStats": {"storageStats": {}}}]).to_list(length=1)
+        storage = stats[0]["storageStats"] if stats else {}
+        sizes[name] = {
+            "count": storage.get("count", 0),
+            "size": storage.get("size", 0),
+            "avg_obj_size": storage.get("avgObjSize", 0),
+            "storage_size": storage.get("storageSize", 0),
+            "total_index_size": storage.get("totalIndexSize", 0),
+            "index_sizes": storage.get("indexSizes", {}),
+        }
+    return sizes
+
+
+def print_sizes(title: str, sizes: dict):
+    print(title)
+    for name, s in sizes.items():
+        print(f"  {name:<12} docs={s['count']:<8} data={s['size']:<12} avg={s['avg_obj_size']:<6} "
+              f"storage={s['storage_size']:<12} indexes={s['total_index_size']}")
+
+
+async def status():
+    for migration in MIGRATIONS:
+        state = await _migrations_col().find_one({"_id": migration_id(migration)}) or {}
+        print(f"{migration_id(migration):<24} {state.get('status', 'pending')}")
+
+
+async def up(batch_size: int):
+    for migration in MIGRATIONS:
+        mid = migration_id(migration)
+        state = await _migrations_col().find_one({"_id": mid})
+        if state and state.get("status") == "done":
+            continue
+
+        collections = list(getattr(migration, "COLLECTIONS", None) or getattr(migration, "REFERENCES", {}))
+        if state is None:
+            before = await collection_sizes(collections)
+            await _migrations_col().insert_one({
+                "_id": mid,
+                "status": "running",
+                "started_at": datetime.utcnow(),
+                "checkpoints": {},
+                "sizes_before": before,
+            })
+        else:
+            # nastavak prekinute migracije, "pre" je vec zabelezeno
+            before = state.get("sizes_before", {})
+            print(f"{mid}: nastavljam od checkpointa {state.get('checkpoints', {})}")
+
+        print(f"{mid}: pokrecem")
+        await migration.up(get_db(), Checkpoint(mid), batch_size)
+
+        after = await collection_sizes(collections)
+        await _migrations_col().update_one(
+            {"_id": mid},
+            {"$set": {"status": "done", "finished_at": datetime.utcnow(), "sizes_after": after}}
+        )
+        print_sizes("pre:", before)
+        print_sizes("posle:", after)
+        print(f"{mid}: gotovo")
+
+
+async def sizes():
+    names = sorted(await get_db().list_collection_names())
+    print_sizes("trenutno:", await collection_sizes(names))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations")
+    parser.add_argument("command", choices=["status", "up", "sizes"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        asyncio.run(status())
+    elif args.command == "up":
+        asyncio.run(up(args.batch_size))
+    else:
+        asyncio.run(sizes())
+
+
+if __name__ == "__main__":
+    main()
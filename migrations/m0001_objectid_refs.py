@@ -0,0 +1,51 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# Reference kao 12-bajtni ObjectId umesto 24-znakovnog hex stringa.
+VERSION = "0001"
+NAME = "objectid_refs"
+
+REFERENCES = {
+    "ideas": ("created_by",),
+    "evaluations": ("idea_id", "user_id"),
+    "comments": ("idea_id", "user_id", "parent_id", "evaluation_id"),
+}
+
+
+def _converted(doc: dict, fields) -> dict:
+    changes = {}
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, str) and ObjectId.is_valid(value):
+            changes[field] = ObjectId(value)
+    return changes
+
+
+async def up(db, checkpoint, batch_size: int):
+    """
+    Prolazi kroz kolekcije po _id u serijama. Posle svake serije zove
+    checkpoint(kolekcija, poslednji_id), pa prekinuta migracija nastavlja odatle.
+    """
+    for collection, fields in REFERENCES.items():
+        col = db[collection]
+        last_id = await checkpoint.get(collection)
+
+        while True:
+            query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+
+            docs = await col.find(query, {field: 1 for field in fields}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            if not docs:
+                break
+
+            ops = []
+            for doc in docs:
+                changes = _converted(doc, fields)
+                if changes:
+                    ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+            if ops:
+                await col.bulk_write(ops, ordered=False)
+
+            last_id = docs[-1]["_id"]
+            await checkpoint.set(collection, last_id)
@@ -0,0 +1,54 @@
+from pymongo import UpdateOne
+
+from repositories.base import FACET_FIELDS
+
+# like_count na idejama + brojaci za GET /ideas/facets (kolekcija idea_facets).
+# Posle ovoga ih odrzavaju evaluate_idea i kreiranje/izmena/brisanje ideje.
+VERSION = "0002"
+NAME = "idea_facets"
+
+COLLECTIONS = ("ideas", "idea_facets")
+
+
+async def _like_counts(db) -> dict:
+    rows = db["evaluations"].aggregate([
+        {"$match": {"liked": True}},
+        {"$group": {"_id": {"$toString": "$idea_id"}, "count": {"$sum": 1}}},
+    ])
+    return {r["_id"]: r["count"] async for r in rows}
+
+
+async def up(db, checkpoint, batch_size: int):
+    """
+    like_count se postavlja u serijama po _id (sa checkpointom), brojaci se
+    racunaju iznova iz ideja, pa je ponovno pokretanje bezbedno.
+    """
+    likes = await _like_counts(db)
+    ideas = db["ideas"]
+    last_id = await checkpoint.get("ideas")
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        docs = await ideas.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            break
+
+        ops = [UpdateOne({"_id": d["_id"]}, {"$set": {"like_count": likes.get(str(d["_id"]), 0)}}) for d in docs]
+        await ideas.bulk_write(ops, ordered=False)
+
+        last_id = docs[-1]["_id"]
+        await checkpoint.set("ideas", last_id)
+
+    facets_col = db["idea_facets"]
+    await facets_col.delete_many({})
+    for field in FACET_FIELDS:
+        rows = ideas.aggregate([
+            {"$match": {field: {"$ne": None}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        ])
+        docs = [
+            {"_id": f"{field}:{r['_id']}", "field": field, "value": r["_id"], "count": r["count"]}
+            async for r in rows
+        ]
+        if docs:
+            await facets_col.insert_many(docs, ordered=False)
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from pymongo import ReplaceOne, UpdateOne
+
+from activity import COUNTERS
+
+# Dnevni/satni brojaci aktivnosti (kolekcija activity) iz postojecih podataka.
+#   ideas        -> ideas.created_at
+#   evaluations  -> evaluations.created_at (starim evaluacijama se postavlja iz _id)
+#   likes        -> lajkovane evaluacije po created_at evaluacije (vreme lajka se ranije nije cuvalo)
+#   follows      -> follows log; postojeca pracenja se upisuju bez created_at i ne broje se
+# Migracija ide posle deploy-a koda koji vec uvecava brojace ($inc), pa se ne dira sve:
+#   dani pre prvog zivog bucket-a -> prepisuju se izracunatim vrednostima (ponovno pokretanje je bezbedno)
+#   prvi zivi dan (dan deploy-a)  -> $max po brojacu, zivi brojaci se nikad ne smanjuju
+#   kasniji dani                  -> samo zivi brojaci
+VERSION = "0003"
+NAME = "activity_rollups"
+
+COLLECTIONS = ("evaluations", "follows", "activity")
+
+SOURCES = {
+    "ideas": ("ideas", {}),
+    "evaluations": ("evaluations", {}),
+    "likes": ("evaluations", {"liked": True}),
+    "follows": ("follows", {}),
+}
+
+
+async def _evaluation_timestamps(db, checkpoint, batch_size: int):
+    # ObjectId nosi vreme kreiranja, a upsert pravi novi _id samo pri prvoj evaluaciji
+    col = db["evaluations"]
+    last_id = await checkpoint.get("evaluations")
+    while True:
+        query = {"created_at": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = await col.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            break
+        ops = [
+            UpdateOne({"_id": d["_id"]}, {"$set": {"created_at": d["_id"].generation_time.replace(tzinfo=None)}})
+            for d in docs
+        ]
+        await col.bulk_write(ops, ordered=False)
+        last_id = docs[-1]["_id"]
+        await checkpoint.set("evaluations", last_id)
+
+
+async def _follows_log(db, batch_size: int):
+    follows = db["follows"]
+    ops = []
+    async for user in db["users"].find({"following.0": {"$exists": True}}, {"username": 1, "following": 1}):
+        for followee in user.get("following", []):
+            ops.append(UpdateOne(
+                {"follower": user["username"], "followee": followee},
+                {"$setOnInsert": {"created_at": None}},
+                upsert=True
+            ))
+            if len(ops) >= batch_size:
+                await follows.bulk_write(ops, ordered=False)
+                ops = []
+    if ops:
+        await follows.bulk_write(ops, ordered=False)
+
+
+async def _cutoff(db, checkpoint) -> str:
+    # pamti se u checkpointu: posle prekida najstariji bucket je vec jedan od prepisanih
+    cutoff = await checkpoint.get("activity_cutoff")
+    if cutoff is None:
+        first = await db["activity"].find_one({}, {"_id": 1}, sort=[("_id", 1)])
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        cutoff = min(first["_id"], today) if first else today
+        await checkpoint.set("activity_cutoff", cutoff)
+    return cutoff
+
+
+async def up(db, checkpoint, batch_size: int):
+    cutoff = await _cutoff(db, checkpoint)
+    await _evaluation_timestamps(db, checkpoint, batch_size)
+    await _follows_log(db, batch_size)
+
+    buckets: dict[str, dict] = {}
+    for counter, (collection, match) in SOURCES.items():
+        rows = db[collection].aggregate([
+            {"$match": {**match, "created_at": {"$type": "date"}}},
+            {"$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%d %H", "date": "$created_at"}},
+                "count": {"$sum": 1},
+            }},
+        ])
+        async for row in rows:
+            day, hour = row["_id"].split(" ")
+            doc = buckets.setdefault(day, {"_id": day, **{c: 0 for c in COUNTERS}, "hours": {}})
+            doc[counter] += row["count"]
+            doc["hours"].setdefault(hour, {})[counter] = row["count"]
+
+    ops = []
+    for day, doc in buckets.items():
+        if day < cutoff:
+            ops.append(ReplaceOne({"_id": day}, doc, upsert=True))
+        elif day == cutoff:
+            fields = {c: doc[c] for c in COUNTERS}
+            fields.update({f"hours.{h}.{c}": n for h, counts in doc["hours"].items() for c, n in counts.items()})
+            ops.append(UpdateOne({"_id": day}, {"$max": fields}, upsert=True))
+    for i in range(0, len(ops), batch_size):
+        await db["activity"].bulk_write(ops[i:i + batch_size], ordered=False)
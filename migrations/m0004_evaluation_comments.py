@@ -0,0 +1,64 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from database import ref, ref_match
+
+# Komentari iz evaluacija (Evaluation.comment) -> kolekcija comments, kao komentari najviseg nivoa.
+# Nove evaluacije to vec rade preko comments.upsert_evaluation_comment; ovo prebacuje postojece.
+VERSION = "0004"
+NAME = "evaluation_comments"
+
+COLLECTIONS = ("evaluations", "comments", "ideas")
+
+
+async def up(db, checkpoint, batch_size: int):
+    """
+    Evaluacije se obilaze u serijama po _id (sa checkpointom). Upsert po evaluation_id samo
+    menja tekst vec prebacenog komentara, a comment_count se na kraju racuna iznova iz
+    kolekcije comments, pa je ponovno pokretanje bezbedno.
+    """
+    evaluations, comments = db["evaluations"], db["comments"]
+    last_id = await checkpoint.get("evaluations")
+
+    while True:
+        query = {"comment": {"$nin": [None, ""]}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = await evaluations.find(
+            query, {"comment": 1, "idea_id": 1, "user_id": 1, "created_at": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            break
+
+        ops = [
+            UpdateOne(
+                {"evaluation_id": ref_match(d["_id"])},
+                {
+                    "$set": {"text": d["comment"]},
+                    "$setOnInsert": {
+                        "evaluation_id": ref(d["_id"]),
+                        "idea_id": ref(d["idea_id"]),
+                        "user_id": ref(d["user_id"]),
+                        "parent_id": None,
+                        "reply_count": 0,
+                        "created_at": d.get("created_at") or d["_id"].generation_time.replace(tzinfo=None),
+                    },
+                },
+                upsert=True,
+            )
+            for d in docs
+        ]
+        await comments.bulk_write(ops, ordered=False)
+
+        last_id = docs[-1]["_id"]
+        await checkpoint.set("evaluations", last_id)
+
+    # brojaci iz stvarnog stanja, za slucaj da je nesto ranije upisano bez $inc
+    rows = comments.aggregate([{"$group": {"_id": {"$toString": "$idea_id"}, "count": {"$sum": 1}}}])
+    ops = [
+        UpdateOne({"_id": ObjectId(row["_id"])}, {"$set": {"comment_count": row["count"]}})
+        async for row in rows
+        if ObjectId.is_valid(row["_id"])
+    ]
+    for i in range(0, len(ops), batch_size):
+        await db["ideas"].bulk_write(ops[i:i + batch_size], ordered=False)
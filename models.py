@@ -11,9 +11,17 @@ from pydantic_core import core_schema
 class PyObjectId(ObjectId):
     @classmethod
     def __get_pydantic_core_schema__(cls, source_type, handler: GetCoreSchemaHandler):
-        # Kada Pydantic validira ObjectId, koristi ovaj schema
-        return core_schema.no_info_after_validator_function(
-            cls.validate, core_schema.str_schema()
+        # Kada Pydantic validira ObjectId, koristi ovaj schema.
+        # Iz baze moze doci i pravi ObjectId, napolje uvek ide string.
+        return core_schema.json_or_python_schema(
+            json_schema=core_schema.no_info_after_validator_function(
+                cls.validate, core_schema.str_schema()
+            ),
+            python_schema=core_schema.no_info_after_validator_function(
+                cls.validate,
+                core_schema.union_schema([core_schema.is_instance_schema(ObjectId), core_schema.str_schema()]),
+            ),
+            serialization=core_schema.to_string_ser_schema(),
         )
 
     @classmethod
@@ -90,8 +98,10 @@ class Idea(BaseModel):
 
 class IdeaDB(Idea):
     id: Annotated[str, Field(alias="_id")]
-    created_by: str
+    created_by: PyObjectId   # string ili ObjectId u bazi, napolje uvek string
     author_username: Optional[str] = None   # 👈 novo polje
+    comment_count: int = 0
+    like_count: int = 0
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -125,6 +135,50 @@ class EvaluationDB(Evaluation):
     )
     
 
+
+class CommentIn(BaseModel):
+    text: Annotated[str, Field(min_length=1, max_length=2000)]
+    parent_id: Optional[PyObjectId] = None   # odgovor na komentar
+
+
+class CommentDB(BaseModel):
+    id: Annotated[PyObjectId, Field(alias="_id")]
+    idea_id: PyObjectId
+    user_id: PyObjectId
+    username: Optional[str] = None
+    text: str
+    parent_id: Optional[PyObjectId] = None
+    reply_count: int = 0
+    created_at: datetime
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_encoders={ObjectId: str},
+        arbitrary_types_allowed=True
+    )
+
+
+class CommentPage(BaseModel):
+    items: List[CommentDB]
+    next_cursor: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class IdeaFacets(BaseModel):
+    market: List[FacetCount]
+    target_audience: List[FacetCount]
+    total: int
+
+
+class IdeaPage(BaseModel):
+    items: List[IdeaDB]
+    next_cursor: Optional[str] = None
+    
+
 #---------------------------------------
 
 #update modeli kasnije!
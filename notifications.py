@@ -0,0 +1,176 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi import WebSocket
+
+from repositories import get_repositories
+
+# Outbox: svaki dogadjaj (lajk/ocena/komentar, follow, nova ideja) se upisuje kao red
+# u kolekciju notifikacija. Dispatcher u svakom workeru periodicno uzima neisporucene redove
+# za korisnike koji su povezani na TAJ worker i salje ih preko WebSocket-a.
+# Sta god ne stigne da se posalje ostaje u kolekciji i cita se preko GET /notifications/.
+
+BATCH_SIZE = 100
+POLL_INTERVAL = 1.0          # sekunde, hvata redove koje su upisali drugi workeri
+LOOKBACK = timedelta(seconds=30)  # stariji neisporuceni redovi idu samo na citanje
+SEND_QUEUE_SIZE = 100        # max poruka koje cekaju na jednoj konekciji
+
+
+def serialize(row: dict) -> dict:
+    return {
+        "id": row["_id"],
+        "type": row["type"],
+        "actor": row.get("actor"),
+        "payload": row.get("payload", {}),
+        "created_at": row["created_at"].isoformat(),
+        "read": row.get("read", False),
+    }
+
+
+class Connection:
+    """Jedna WebSocket konekcija sa ogranicenim redom za slanje."""
+
+    def __init__(self, websocket: WebSocket, username: str):
+        self.websocket = websocket
+        self.username = username
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.pending: set[str] = set()
+
+    def offer(self, row: dict) -> bool:
+        # backpressure: ako je red pun, poruka ostaje neisporucena u bazi
+        if row["_id"] in self.pending:
+            return True
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            return False
+        self.pending.add(row["_id"])
+        return True
+
+    async def run(self):
+        try:
+            while True:
+                rows = [await self.queue.get()]
+                while len(rows) < BATCH_SIZE and not self.queue.empty():
+                    rows.append(self.queue.get_nowait())
+
+                for row in rows:
+                    await self.websocket.send_json(serialize(row))
+
+                ids = [row["_id"] for row in rows]
+                await get_repositories().notifications.mark_delivered(ids)
+                self.pending.difference_update(ids)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # konekcija je pukla, neposlato ostaje u bazi
+            pass
+
+
+class ConnectionManager:
+    def __init__(self):
+        self.connections: dict[str, set[Connection]] = defaultdict(set)
+
+    def connect(self, websocket: WebSocket, username: str) -> Connection:
+        conn = Connection(websocket, username)
+        self.connections[username].add(conn)
+        return conn
+
+    def disconnect(self, conn: Connection):
+        conns = self.connections.get(conn.username)
+        if conns is None:
+            return
+        conns.discard(conn)
+        if not conns:
+            del self.connections[conn.username]
+
+    def usernames(self) -> list[str]:
+        return list(self.connections)
+
+    def push(self, row: dict):
+        for conn in list(self.connections.get(row["recipient"], ())):
+            conn.offer(row)
+
+
+manager = ConnectionManager()
+# pravi ga dispatcher u svom event loop-u; bez dispatchera emit samo upisuje u outbox
+_wakeup: asyncio.Event | None = None
+
+
+async def emit(event_type: str, recipients, actor: str | None = None, **payload):
+    """Upisuje dogadjaj u outbox za svakog primaoca (osim samog autora akcije)."""
+    recipients = {r for r in recipients if r and r != actor}
+    if not recipients:
+        return
+
+    now = datetime.utcnow()
+    docs = [
+        {
+            "type": event_type,
+            "recipient": recipient,
+            "actor": actor,
+            "payload": payload,
+            "created_at": now,
+            "delivered": False,
+            "read": False,
+        }
+        for recipient in recipients
+    ]
+    await get_repositories().notifications.insert_many(docs)
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def send_backlog(conn: Connection):
+    # odmah po konekciji posalji ono sto je korisnik propustio
+    rows = await get_repositories().notifications.undelivered(conn.username, SEND_QUEUE_SIZE)
+    for row in rows:
+        if not conn.offer(row):
+            break
+
+
+async def dispatch_batch(after: str) -> list[dict]:
+    usernames = manager.usernames()
+    if not usernames:
+        return []
+
+    return await get_repositories().notifications.pending(usernames, after, BATCH_SIZE)
+
+
+async def dispatcher():
+    global _wakeup
+    wakeup = _wakeup = asyncio.Event()
+    try:
+        await _dispatch_loop(wakeup)
+    finally:
+        if _wakeup is wakeup:
+            _wakeup = None
+
+
+async def _dispatch_loop(wakeup: asyncio.Event):
+    while True:
+        # asyncio.timeout, ne wait_for: wait_for na 3.11 proguta cancel koji stigne
+        # posle set() pa dispatcher nikad ne bi stao
+        try:
+            async with asyncio.timeout(POLL_INTERVAL):
+                await wakeup.wait()
+        except TimeoutError:
+            pass
+        wakeup.clear()
+
+        try:
+            after = str(ObjectId.from_datetime(datetime.utcnow() - LOOKBACK))
+            while True:
+                rows = await dispatch_batch(after)
+                for row in rows:
+                    manager.push(row)
+                if len(rows) < BATCH_SIZE:
+                    break
+                after = rows[-1]["_id"]
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # baza trenutno nedostupna, probaj u sledecem krugu
+            await asyncio.sleep(POLL_INTERVAL)
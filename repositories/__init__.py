@@ -0,0 +1,79 @@
+from repositories.base import (
+    ActivityRepository,
+    CommentRepository,
+    EvaluationRepository,
+    IdeaRepository,
+    NotificationRepository,
+    UserRepository,
+)
+from repositories.scoped import lookup_scope, memoize, scoped
+from settings import get_settings
+
+# "mongo" (podrazumevano) ili "memory" za testove i benchmark bez mongod-a, vidi settings.py
+REPOSITORY_BACKEND = get_settings().repository_backend
+
+
+class Repositories:
+    def __init__(self, backend: str, users: UserRepository, ideas: IdeaRepository,
+                 evaluations: EvaluationRepository, comments: CommentRepository,
+                 notifications: NotificationRepository, activity: ActivityRepository):
+        self.backend = backend
+        self.users = users
+        self.ideas = ideas
+        self.evaluations = evaluations
+        self.comments = comments
+        self.notifications = notifications
+        self.activity = activity
+
+
+def create_repositories(backend: str = REPOSITORY_BACKEND) -> Repositories:
+    if backend == "mongo":
+        from repositories.mongo import create_mongo_repositories
+        return create_mongo_repositories()
+    if backend == "memory":
+        from repositories.memory import create_memory_repositories
+        return create_memory_repositories()
+    raise ValueError(f"Nepoznat REPOSITORY_BACKEND: {backend}")
+
+
+_repositories: Repositories | None = None
+
+
+def get_repositories() -> Repositories:
+    global _repositories
+    if _repositories is None:
+        _repositories = create_repositories()
+    # unutar lookup_scope citanja idu kroz zajednicki kes zahteva
+    return scoped(_repositories)
+
+
+def set_repositories(repositories: Repositories | None):
+    """Zamena backenda (npr. in-memory u testovima i benchmarku); None = ponovo iz podesavanja."""
+    global _repositories
+    _repositories = repositories
+
+
+# FastAPI dependencies
+# async da bi se izvrsavale u event loop-u (vide contextvars zahteva, bez threadpool-a)
+async def get_user_repo() -> UserRepository:
+    return get_repositories().users
+
+
+async def get_idea_repo() -> IdeaRepository:
+    return get_repositories().ideas
+
+
+async def get_evaluation_repo() -> EvaluationRepository:
+    return get_repositories().evaluations
+
+
+async def get_comment_repo() -> CommentRepository:
+    return get_repositories().comments
+
+
+async def get_notification_repo() -> NotificationRepository:
+    return get_repositories().notifications
+
+
+async def get_activity_repo() -> ActivityRepository:
+    return get_repositories().activity
@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+# Svi repozitorijumi vracaju obicne dict-ove u obliku Mongo dokumenta,
+# sa "_id" i referencama (created_by, idea_id, user_id...) kao stringovima.
+# projection ima isto znacenje kao u Mongo-u ({"title": 1} ili {"password": 0}).
+
+# ideje se mogu filtrirati i brojati po ovim poljima (GET /ideas/facets, /ideas/browse)
+FACET_FIELDS = ("market", "target_audience")
+# sort za browse -> polje po kom se sortira (opadajuce, _id razbija jednakost)
+BROWSE_SORTS = {"new": "created_at", "likes": "like_count"}
+# filters za facets/browse: market, target_audience, created_from, created_to, min_likes
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def get(self, user_id: str, projection: Optional[dict] = None) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def get_by_username(self, username: str, projection: Optional[dict] = None) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def usernames_by_ids(self, user_ids: Iterable[str]) -> dict[str, str]: ...
+
+    @abstractmethod
+    async def existing_usernames(self, usernames: Iterable[str]) -> List[str]: ...
+
+    @abstractmethod
+    async def list(self, projection: Optional[dict] = None) -> List[dict]: ...
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> str: ...
+
+    @abstractmethod
+    async def update(self, user_id: str, fields: dict) -> bool: ...
+
+    @abstractmethod
+    async def delete(self, user_id: str) -> Optional[List[str]]:
+        """None ako korisnik ne postoji, inace _id-jevi korisnika iz cijih followers/following je uklonjen."""
+
+    @abstractmethod
+    async def delete_by_username_contains(self, text: str) -> Tuple[List[str], List[str]]:
+        """(obrisani _id-jevi, _id-jevi preostalih korisnika kojima su izmenjeni followers/following)."""
+
+    @abstractmethod
+    async def follow(self, follower: str, followee: str) -> None:
+        """Pored followers/following nizova upisuje i red u follows log (sa created_at)."""
+
+    @abstractmethod
+    async def unfollow(self, follower: str, followee: str) -> None: ...
+
+
+class IdeaRepository(ABC):
+    @abstractmethod
+    async def get(self, idea_id: str, projection: Optional[dict] = None) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def list(self, projection: Optional[dict] = None, created_from: Optional[datetime] = None,
+                   created_to: Optional[datetime] = None) -> List[dict]: ...
+
+    @abstractmethod
+    async def list_by_creator(self, user_id: str, projection: Optional[dict] = None) -> List[dict]: ...
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> str: ...
+
+    @abstractmethod
+    async def update(self, idea_id: str, fields: dict) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def delete(self, idea_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def inc_comment_count(self, idea_id: str, by: int = 1) -> None: ...
+
+    @abstractmethod
+    async def inc_like_count(self, idea_id: str, by: int = 1) -> None: ...
+
+    @abstractmethod
+    async def facets(self, filters: dict) -> dict:
+        """
+        {"market": [{"value", "count"}], "target_audience": [...], "total": n}.
+        Brojevi za jedno polje ne primenjuju filter tog polja (drill-down).
+        """
+
+    @abstractmethod
+    async def facet_totals(self) -> dict:
+        """Isto sto i facets({}), ali iz brojaca koje odrzavaju insert/update/delete."""
+
+    @abstractmethod
+    async def browse(self, filters: dict, sort: str, after: Optional[tuple], limit: int,
+                     projection: Optional[dict] = None) -> List[dict]:
+        """Strana ideja po BROWSE_SORTS[sort] opadajuce; after = (vrednost, _id) poslednje vracene."""
+
+
+class EvaluationRepository(ABC):
+    @abstractmethod
+    async def upsert(self, idea_id: str, user_id: str, fields: dict) -> tuple[Optional[dict], dict]:
+        """Vraca (evaluacija pre izmene ili None ako je nova, evaluacija posle izmene)."""
+
+    @abstractmethod
+    async def list(self, projection: Optional[dict] = None) -> List[dict]: ...
+
+    @abstractmethod
+    async def list_for_idea(self, idea_id: str, liked_only: bool = False) -> List[dict]: ...
+
+    @abstractmethod
+    async def count_likes(self, idea_id: str) -> int: ...
+
+    @abstractmethod
+    async def totals_for_ideas(self, idea_ids: Iterable[str]) -> dict[str, dict]:
+        """{idea_id: {"likes", "score_sum", "score_count"}} samo za ideje koje imaju evaluacije."""
+
+
+class CommentRepository(ABC):
+    @abstractmethod
+    async def get(self, comment_id: str, idea_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> str: ...
+
+    @abstractmethod
+    async def page(self, idea_id: str, parent_id: Optional[str], after: Optional[tuple[datetime, str]],
+                   limit: int) -> List[dict]: ...
+
+    @abstractmethod
+    async def inc_reply_count(self, comment_id: str, by: int = 1) -> None: ...
+
+    @abstractmethod
+    async def upsert_for_evaluation(self, evaluation: dict, created_at: datetime) -> bool:
+        """Vraca True ako je komentar tek kreiran."""
+
+
+class ActivityRepository(ABC):
+    """Dnevni bucket-i sa brojacima aktivnosti: {_id: "2025-01-31", ideas: n, ..., hours: {"13": {...}}}."""
+
+    @abstractmethod
+    async def increment(self, at: datetime, counters: dict[str, int]) -> None: ...
+
+    @abstractmethod
+    async def days(self, first: str, last: str) -> List[dict]:
+        """Bucket-i od first do last ("YYYY-MM-DD", ukljucivo), po danu; dani bez aktivnosti ne postoje."""
+
+
+class NotificationRepository(ABC):
+    @abstractmethod
+    async def insert_many(self, docs: List[dict]) -> None: ...
+
+    @abstractmethod
+    async def pending(self, recipients: Iterable[str], after_id: str, limit: int) -> List[dict]:
+        """Neisporuceni redovi za date primaoce sa _id vecim od after_id, po _id."""
+
+    @abstractmethod
+    async def undelivered(self, recipient: str, limit: int) -> List[dict]: ...
+
+    @abstractmethod
+    async def list_for(self, recipient: str, unread_only: bool, limit: int) -> List[dict]: ...
+
+    @abstractmethod
+    async def mark_delivered(self, ids: Iterable[str]) -> None: ...
+
+    @abstractmethod
+    async def mark_read(self, recipient: str, ids: Optional[Iterable[str]] = None) -> int: ...
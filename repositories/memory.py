@@ -0,0 +1,496 @@
+import bisect
+import re
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+
+from repositories.base import (
+    BROWSE_SORTS,
+    FACET_FIELDS,
+    ActivityRepository,
+    CommentRepository,
+    EvaluationRepository,
+    IdeaRepository,
+    NotificationRepository,
+    UserRepository,
+)
+
+# In-memory backend: isti ugovor kao Mongo repozitorijumi, bez mongod-a.
+# Koristi se za testove i za merenje Python troska API-ja odvojeno od baze.
+# Svaki upit koji routeri rade ima svoj indeks (dict), pa nema skeniranja kolekcija.
+
+
+def _new_id() -> str:
+    # hex ObjectId stringovi se sortiraju isto kao ObjectId-jevi
+    return str(ObjectId())
+
+
+def _copy_value(value):
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _project(doc: Optional[dict], projection: Optional[dict] = None) -> Optional[dict]:
+    """Kopija dokumenta sa Mongo semantikom projekcije."""
+    if doc is None:
+        return None
+    if not projection:
+        return {k: _copy_value(v) for k, v in doc.items()}
+
+    include = [k for k, v in projection.items() if v and k != "_id"]
+    if include:
+        out = {k: _copy_value(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1):
+            out["_id"] = doc["_id"]
+        return out
+
+    exclude = {k for k, v in projection.items() if not v}
+    return {k: _copy_value(v) for k, v in doc.items() if k not in exclude}
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self):
+        self._docs: dict[str, dict] = {}
+        self._by_email: dict[str, str] = {}
+        self._by_username: dict[str, str] = {}
+        self._follows: dict[tuple[str, str], datetime] = {}  # follows log
+
+    def _index(self, doc):
+        if doc.get("email") is not None:
+            self._by_email[doc["email"]] = doc["_id"]
+        if doc.get("username") is not None:
+            self._by_username[doc["username"]] = doc["_id"]
+
+    def _unindex(self, doc):
+        if self._by_email.get(doc.get("email")) == doc["_id"]:
+            del self._by_email[doc["email"]]
+        if self._by_username.get(doc.get("username")) == doc["_id"]:
+            del self._by_username[doc["username"]]
+
+    async def get(self, user_id, projection=None):
+        return _project(self._docs.get(str(user_id)), projection)
+
+    async def get_by_email(self, email):
+        return _project(self._docs.get(self._by_email.get(email)))
+
+    async def get_by_username(self, username, projection=None):
+        return _project(self._docs.get(self._by_username.get(username)), projection)
+
+    async def usernames_by_ids(self, user_ids):
+        result = {}
+        for user_id in {str(u) for u in user_ids}:
+            doc = self._docs.get(user_id)
+            if doc is not None:
+                result[user_id] = doc["username"]
+        return result
+
+    async def existing_usernames(self, usernames):
+        return [u for u in usernames if u in self._by_username]
+
+    async def list(self, projection=None):
+        return [_project(d, projection) for d in self._docs.values()]
+
+    async def insert(self, doc):
+        doc = _project(doc)
+        doc["_id"] = _new_id()
+        self._docs[doc["_id"]] = doc
+        self._index(doc)
+        return doc["_id"]
+
+    async def update(self, user_id, fields):
+        doc = self._docs.get(str(user_id))
+        if doc is None:
+            return False
+        self._unindex(doc)
+        doc.update(_project(fields))
+        self._index(doc)
+        return True
+
+    async def delete(self, user_id):
+        doc = self._docs.pop(str(user_id), None)
+        if doc is None:
+            return None
+        self._unindex(doc)
+        # isto kao Mongo: obrisani korisnik nestaje iz followers/following ostalih
+        username = doc.get("username")
+        affected = []
+        for other in doc.get("followers", []):
+            affected.append(self._pull(other, "following", username))
+        for other in doc.get("following", []):
+            affected.append(self._pull(other, "followers", username))
+        for pair in [p for p in self._follows if username in p]:
+            del self._follows[pair]
+        return list(dict.fromkeys(a for a in affected if a))
+
+    async def delete_by_username_contains(self, text):
+        pattern = re.compile(text, re.IGNORECASE)
+        matched = [d for d in self._docs.values() if pattern.search(d.get("username", ""))]
+        affected = []
+        for doc in matched:
+            affected.extend(await self.delete(doc["_id"]))
+        deleted = [doc["_id"] for doc in matched]
+        return deleted, [a for a in dict.fromkeys(affected) if a not in deleted]
+
+    def _add_to_set(self, username, field, value):
+        doc = self._docs.get(self._by_username.get(username))
+        if doc is not None:
+            values = doc.setdefault(field, [])
+            if value not in values:
+                values.append(value)
+
+    def _pull(self, username, field, value):
+        doc = self._docs.get(self._by_username.get(username))
+        if doc is not None and doc.get(field):
+            doc[field] = [v for v in doc[field] if v != value]
+            return doc["_id"]
+
+    async def follow(self, follower, followee):
+        self._add_to_set(followee, "followers", follower)
+        self._add_to_set(follower, "following", followee)
+        self._follows.setdefault((follower, followee), datetime.utcnow())
+
+    async def unfollow(self, follower, followee):
+        self._pull(followee, "followers", follower)
+        self._pull(follower, "following", followee)
+        self._follows.pop((follower, followee), None)
+
+
+def _matches(doc: dict, filters: dict, skip: Optional[str] = None) -> bool:
+    for field in FACET_FIELDS:
+        if field != skip and filters.get(field) is not None and doc.get(field) != filters[field]:
+            return False
+    created_at = doc.get("created_at")
+    if filters.get("created_from") and (created_at is None or created_at < filters["created_from"]):
+        return False
+    if filters.get("created_to") and (created_at is None or created_at > filters["created_to"]):
+        return False
+    if filters.get("min_likes") and doc.get("like_count", 0) < filters["min_likes"]:
+        return False
+    return True
+
+
+def _facet_list(counts: dict) -> list[dict]:
+    rows = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [{"value": v, "count": c} for v, c in rows if c > 0]
+
+
+class MemoryIdeaRepository(IdeaRepository):
+    def __init__(self):
+        self._docs: dict[str, dict] = {}
+        self._by_creator: dict[str, dict[str, None]] = {}  # dict kao uredjen skup
+        # polje -> vrednost -> _id-jevi; velicina skupa je ujedno i broj za facet
+        self._by_facet: dict[str, dict[str, dict[str, None]]] = {f: {} for f in FACET_FIELDS}
+
+    def _index_facets(self, doc):
+        for field in FACET_FIELDS:
+            if doc.get(field) is not None:
+                self._by_facet[field].setdefault(doc[field], {})[doc["_id"]] = None
+
+    def _unindex_facets(self, doc):
+        for field in FACET_FIELDS:
+            ids = self._by_facet[field].get(doc.get(field))
+            if ids is not None:
+                ids.pop(doc["_id"], None)
+                if not ids:
+                    del self._by_facet[field][doc[field]]
+
+    def _candidates(self, filters: dict):
+        # najuzi indeks od zadatih facet filtera, inace sve ideje
+        sets = [self._by_facet[f].get(filters[f], {}) for f in FACET_FIELDS if filters.get(f) is not None]
+        if not sets:
+            return self._docs.values()
+        return (self._docs[i] for i in min(sets, key=len))
+
+    async def get(self, idea_id, projection=None):
+        return _project(self._docs.get(str(idea_id)), projection)
+
+    async def list(self, projection=None, created_from=None, created_to=None):
+        result = []
+        for doc in self._docs.values():
+            created_at = doc.get("created_at")
+            if created_from and (created_at is None or created_at < created_from):
+                continue
+            if created_to and (created_at is None or created_at > created_to):
+                continue
+            result.append(_project(doc, projection))
+        return result
+
+    async def list_by_creator(self, user_id, projection=None):
+        ids = self._by_creator.get(str(user_id), {})
+        return [_project(self._docs[i], projection) for i in ids]
+
+    async def insert(self, doc):
+        doc = _project(doc)
+        doc["_id"] = _new_id()
+        doc["created_by"] = str(doc["created_by"])
+        doc.setdefault("like_count", 0)
+        self._docs[doc["_id"]] = doc
+        self._by_creator.setdefault(doc["created_by"], {})[doc["_id"]] = None
+        self._index_facets(doc)
+        return doc["_id"]
+
+    async def update(self, idea_id, fields):
+        doc = self._docs.get(str(idea_id))
+        if doc is None:
+            return None
+        self._unindex_facets(doc)
+        doc.update(_project(fields))
+        self._index_facets(doc)
+        return _project(doc)
+
+    async def delete(self, idea_id):
+        doc = self._docs.pop(str(idea_id), None)
+        if doc is not None:
+            self._by_creator.get(doc["created_by"], {}).pop(doc["_id"], None)
+            self._unindex_facets(doc)
+        return doc
+
+    async def inc_comment_count(self, idea_id, by=1):
+        doc = self._docs.get(str(idea_id))
+        if doc is not None:
+            doc["comment_count"] = doc.get("comment_count", 0) + by
+
+    async def inc_like_count(self, idea_id, by=1):
+        doc = self._docs.get(str(idea_id))
+        if doc is not None:
+            doc["like_count"] = doc.get("like_count", 0) + by
+
+    async def facets(self, filters):
+        counts = {field: {} for field in FACET_FIELDS}
+        total = 0
+        for doc in self._docs.values():
+            if not _matches(doc, {k: v for k, v in filters.items() if k not in FACET_FIELDS}):
+                continue
+            for field in FACET_FIELDS:
+                if doc.get(field) is not None and _matches(doc, filters, skip=field):
+                    counts[field][doc[field]] = counts[field].get(doc[field], 0) + 1
+            if _matches(doc, filters):
+                total += 1
+        result = {field: _facet_list(counts[field]) for field in FACET_FIELDS}
+        result["total"] = total
+        return result
+
+    async def facet_totals(self):
+        result = {
+            field: _facet_list({v: len(ids) for v, ids in self._by_facet[field].items()})
+            for field in FACET_FIELDS
+        }
+        result["total"] = len(self._docs)
+        return result
+
+    async def browse(self, filters, sort, after, limit, projection=None):
+        key = BROWSE_SORTS[sort]
+        docs = [d for d in self._candidates(filters) if _matches(d, filters)]
+        docs.sort(key=lambda d: (d.get(key), d["_id"]), reverse=True)
+        if after:
+            docs = [d for d in docs if (d.get(key), d["_id"]) < tuple(after)]
+        return [_project(d, projection) for d in docs[:limit]]
+
+
+class MemoryEvaluationRepository(EvaluationRepository):
+    def __init__(self):
+        self._docs: dict[str, dict] = {}
+        self._by_pair: dict[tuple[str, str], str] = {}
+        self._by_idea: dict[str, dict[str, None]] = {}
+
+    async def upsert(self, idea_id, user_id, fields):
+        idea_id, user_id = str(idea_id), str(user_id)
+        eval_id = self._by_pair.get((idea_id, user_id))
+        before = None
+        if eval_id is None:
+            eval_id = _new_id()
+            self._docs[eval_id] = {"_id": eval_id}
+            self._by_pair[(idea_id, user_id)] = eval_id
+            self._by_idea.setdefault(idea_id, {})[eval_id] = None
+            self._docs[eval_id]["created_at"] = datetime.utcnow()
+        else:
+            before = _project(self._docs[eval_id])
+
+        doc = self._docs[eval_id]
+        doc.update(_project(fields))
+        doc["idea_id"] = idea_id
+        doc["user_id"] = user_id
+        return before, _project(doc)
+
+    async def list(self, projection=None):
+        return [_project(d, projection) for d in self._docs.values()]
+
+    async def list_for_idea(self, idea_id, liked_only=False):
+        docs = (self._docs[i] for i in self._by_idea.get(str(idea_id), {}))
+        return [_project(d) for d in docs if not liked_only or d.get("liked") is True]
+
+    async def count_likes(self, idea_id):
+        return sum(
+            1 for i in self._by_idea.get(str(idea_id), {})
+            if self._docs[i].get("liked") is True
+        )
+
+    async def totals_for_ideas(self, idea_ids):
+        result = {}
+        for idea_id in {str(i) for i in idea_ids}:
+            eval_ids = self._by_idea.get(idea_id)
+            if not eval_ids:
+                continue
+            totals = {"likes": 0, "score_sum": 0, "score_count": 0}
+            for i in eval_ids:
+                doc = self._docs[i]
+                if doc.get("liked") is True:
+                    totals["likes"] += 1
+                if isinstance(doc.get("score"), (int, float)):
+                    totals["score_sum"] += doc["score"]
+                    totals["score_count"] += 1
+            result[idea_id] = totals
+        return result
+
+
+class MemoryCommentRepository(CommentRepository):
+    def __init__(self):
+        self._docs: dict[str, dict] = {}
+        # (idea_id, parent_id) -> sortirana lista (created_at, _id), kao indeks u Mongo-u
+        self._threads: dict[tuple[str, Optional[str]], list] = {}
+        self._by_evaluation: dict[str, str] = {}
+
+    def _add(self, doc):
+        self._docs[doc["_id"]] = doc
+        key = (doc["idea_id"], doc.get("parent_id"))
+        bisect.insort(self._threads.setdefault(key, []), (doc["created_at"], doc["_id"]))
+
+    async def get(self, comment_id, idea_id):
+        doc = self._docs.get(str(comment_id))
+        if doc is None or doc["idea_id"] != str(idea_id):
+            return None
+        return _project(doc)
+
+    async def insert(self, doc):
+        doc = _project(doc)
+        doc["_id"] = _new_id()
+        doc["idea_id"] = str(doc["idea_id"])
+        doc["user_id"] = str(doc["user_id"])
+        doc["parent_id"] = str(doc["parent_id"]) if doc.get("parent_id") else None
+        self._add(doc)
+        return doc["_id"]
+
+    async def page(self, idea_id, parent_id, after, limit):
+        thread = self._threads.get((str(idea_id), str(parent_id) if parent_id else None), [])
+        start = bisect.bisect_right(thread, after) if after else 0
+        return [_project(self._docs[i]) for _, i in thread[start:start + limit]]
+
+    async def inc_reply_count(self, comment_id, by=1):
+        doc = self._docs.get(str(comment_id))
+        if doc is not None:
+            doc["reply_count"] = doc.get("reply_count", 0) + by
+
+    async def upsert_for_evaluation(self, evaluation, created_at):
+        eval_id = str(evaluation["_id"])
+        comment_id = self._by_evaluation.get(eval_id)
+        if comment_id is not None:
+            self._docs[comment_id]["text"] = evaluation["comment"]
+            return False
+
+        doc = {
+            "_id": _new_id(),
+            "evaluation_id": eval_id,
+            "idea_id": str(evaluation["idea_id"]),
+            "user_id": str(evaluation["user_id"]),
+            "text": evaluation["comment"],
+            "parent_id": None,
+            "reply_count": 0,
+            "created_at": created_at,
+        }
+        self._add(doc)
+        self._by_evaluation[eval_id] = doc["_id"]
+        return True
+
+
+class MemoryNotificationRepository(NotificationRepository):
+    def __init__(self):
+        self._docs: dict[str, dict] = {}
+        self._by_recipient: dict[str, list[str]] = {}  # _id-jevi u rastucem redosledu
+
+    async def insert_many(self, docs):
+        for doc in docs:
+            doc = _project(doc)
+            doc["_id"] = _new_id()
+            self._docs[doc["_id"]] = doc
+            self._by_recipient.setdefault(doc["recipient"], []).append(doc["_id"])
+
+    async def pending(self, recipients, after_id, limit):
+        result = []
+        for recipient in set(recipients):
+            ids = self._by_recipient.get(recipient, [])
+            for i in ids[bisect.bisect_right(ids, after_id):]:
+                if not self._docs[i]["delivered"]:
+                    result.append(i)
+        result.sort()
+        return [_project(self._docs[i]) for i in result[:limit]]
+
+    async def undelivered(self, recipient, limit):
+        ids = [i for i in self._by_recipient.get(recipient, []) if not self._docs[i]["delivered"]]
+        return [_project(self._docs[i]) for i in ids[:limit]]
+
+    async def list_for(self, recipient, unread_only, limit):
+        result = []
+        for i in reversed(self._by_recipient.get(recipient, [])):
+            doc = self._docs[i]
+            if unread_only and doc["read"]:
+                continue
+            result.append(_project(doc))
+            if len(result) >= limit:
+                break
+        return result
+
+    async def mark_delivered(self, ids):
+        for i in ids:
+            doc = self._docs.get(str(i))
+            if doc is not None:
+                doc["delivered"] = True
+
+    async def mark_read(self, recipient, ids=None):
+        if ids is None:
+            ids = self._by_recipient.get(recipient, [])
+        count = 0
+        for i in ids:
+            doc = self._docs.get(str(i))
+            if doc is None or doc["recipient"] != recipient or doc["read"]:
+                continue
+            doc["read"] = True
+            doc["delivered"] = True
+            count += 1
+        return count
+
+
+class MemoryActivityRepository(ActivityRepository):
+    def __init__(self):
+        self._days: dict[str, dict] = {}
+
+    async def increment(self, at, counters):
+        day = at.strftime("%Y-%m-%d")
+        doc = self._days.setdefault(day, {"_id": day, "hours": {}})
+        hour = doc["hours"].setdefault(f"{at.hour:02d}", {})
+        for name, by in counters.items():
+            doc[name] = doc.get(name, 0) + by
+            hour[name] = hour.get(name, 0) + by
+
+    async def days(self, first, last):
+        return [
+            {**self._days[d], "hours": {h: dict(c) for h, c in self._days[d]["hours"].items()}}
+            for d in sorted(self._days) if first <= d <= last
+        ]
+
+
+def create_memory_repositories():
+    from repositories import Repositories
+
+    return Repositories(
+        backend="memory",
+        users=MemoryUserRepository(),
+        ideas=MemoryIdeaRepository(),
+        evaluations=MemoryEvaluationRepository(),
+        comments=MemoryCommentRepository(),
+        notifications=MemoryNotificationRepository(),
+        activity=MemoryActivityRepository(),
+    )
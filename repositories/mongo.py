@@ -0,0 +1,448 @@
+from datetime import datetime
+from typing import Iterable, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from database import ref, ref_match
+from repositories.base import (
+    BROWSE_SORTS,
+    FACET_FIELDS,
+    ActivityRepository,
+    CommentRepository,
+    EvaluationRepository,
+    IdeaRepository,
+    NotificationRepository,
+    UserRepository,
+)
+
+
+def _out(doc: Optional[dict], *refs: str) -> Optional[dict]:
+    # _id i reference napolje uvek kao string, bez obzira kako su sacuvani
+    if doc is None:
+        return None
+    if "_id" in doc:
+        doc["_id"] = str(doc["_id"])
+    for field in refs:
+        if doc.get(field) is not None:
+            doc[field] = str(doc[field])
+    return doc
+
+
+def _oid(value) -> Optional[ObjectId]:
+    return ObjectId(value) if ObjectId.is_valid(value) else None
+
+
+def _oids(values: Iterable) -> list[ObjectId]:
+    return [ObjectId(v) for v in {str(v) for v in values} if ObjectId.is_valid(v)]
+
+
+class MongoUserRepository(UserRepository):
+    def __init__(self, col, follows_col):
+        self.col = col
+        # {follower, followee, created_at}; nizovi u users ostaju izvor za citanje
+        self.follows_col = follows_col
+
+    async def get(self, user_id, projection=None):
+        oid = _oid(user_id)
+        if oid is None:
+            return None
+        return _out(await self.col.find_one({"_id": oid}, projection))
+
+    async def get_by_email(self, email):
+        return _out(await self.col.find_one({"email": email}))
+
+    async def get_by_username(self, username, projection=None):
+        return _out(await self.col.find_one({"username": username}, projection))
+
+    async def usernames_by_ids(self, user_ids):
+        ids = _oids(user_ids)
+        if not ids:
+            return {}
+        users = await self.col.find({"_id": {"$in": ids}}, {"username": 1}).to_list(length=None)
+        return {str(u["_id"]): u["username"] for u in users}
+
+    async def existing_usernames(self, usernames):
+        usernames = list(usernames)
+        if not usernames:
+            return []
+        users = await self.col.find({"username": {"$in": usernames}}, {"username": 1}).to_list(length=None)
+        return [u["username"] for u in users if "username" in u]
+
+    async def list(self, projection=None):
+        return [_out(u) for u in await self.col.find({}, projection).to_list(length=None)]
+
+    async def insert(self, doc):
+        res = await self.col.insert_one(dict(doc))
+        return str(res.inserted_id)
+
+    async def update(self, user_id, fields):
+        res = await self.col.update_one({"_id": ObjectId(user_id)}, {"$set": fields})
+        return res.matched_count > 0
+
+    async def _pull_follows(self, usernames) -> list[str]:
+        # followers/following su username-ovi, obrisani korisnici ne smeju da ostanu u njima;
+        # vraca _id-jeve izmenjenih korisnika (njihovi kesirani profili vise ne vaze)
+        usernames = [u for u in usernames if u]
+        if not usernames:
+            return []
+        query = {"$or": [{"followers": {"$in": usernames}}, {"following": {"$in": usernames}}]}
+        affected = [str(d["_id"]) for d in await self.col.find(query, {"_id": 1}).to_list(length=None)]
+        await self.col.update_many(
+            query, {"$pull": {"followers": {"$in": usernames}, "following": {"$in": usernames}}}
+        )
+        await self.follows_col.delete_many(
+            {"$or": [{"follower": {"$in": usernames}}, {"followee": {"$in": usernames}}]}
+        )
+        return affected
+
+    async def delete(self, user_id):
+        doc = await self.col.find_one_and_delete({"_id": ObjectId(user_id)}, {"username": 1})
+        if doc is None:
+            return None
+        return await self._pull_follows([doc.get("username")])
+
+    async def delete_by_username_contains(self, text):
+        query = {"username": {"$regex": text, "$options": "i"}}
+        docs = await self.col.find(query, {"username": 1}).to_list(length=None)
+        await self.col.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        affected = await self._pull_follows([d["username"] for d in docs])
+        return [str(d["_id"]) for d in docs], affected
+
+    async def follow(self, follower, followee):
+        await self.col.update_one({"username": followee}, {"$addToSet": {"followers": follower}})
+        await self.col.update_one({"username": follower}, {"$addToSet": {"following": followee}})
+        await self.follows_col.update_one(
+            {"follower": follower, "followee": followee},
+            {"$setOnInsert": {"created_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    async def unfollow(self, follower, followee):
+        await self.col.update_one({"username": followee}, {"$pull": {"followers": follower}})
+        await self.col.update_one({"username": follower}, {"$pull": {"following": followee}})
+        await self.follows_col.delete_one({"follower": follower, "followee": followee})
+
+
+def _range_query(filters: dict) -> dict:
+    query = {}
+    if filters.get("created_from") or filters.get("created_to"):
+        query["created_at"] = {}
+        if filters.get("created_from"):
+            query["created_at"]["$gte"] = filters["created_from"]
+        if filters.get("created_to"):
+            query["created_at"]["$lte"] = filters["created_to"]
+    if filters.get("min_likes"):
+        query["like_count"] = {"$gte": filters["min_likes"]}
+    return query
+
+
+def _facet_query(filters: dict, skip: Optional[str] = None) -> dict:
+    return {f: filters[f] for f in FACET_FIELDS if f != skip and filters.get(f) is not None}
+
+
+class MongoIdeaRepository(IdeaRepository):
+    def __init__(self, col, facets_col):
+        self.col = col
+        # brojaci po vrednosti: {_id: "market:fintech", field, value, count}
+        self.facets_col = facets_col
+
+    async def _count_facets(self, changes: list[tuple[str, str, int]]):
+        ops = [
+            UpdateOne(
+                {"_id": f"{field}:{value}"},
+                {"$inc": {"count": by}, "$setOnInsert": {"field": field, "value": value}},
+                upsert=True
+            )
+            for field, value, by in changes if value is not None
+        ]
+        if ops:
+            await self.facets_col.bulk_write(ops, ordered=False)
+
+    async def get(self, idea_id, projection=None):
+        oid = _oid(idea_id)
+        if oid is None:
+            return None
+        return _out(await self.col.find_one({"_id": oid}, projection), "created_by")
+
+    async def list(self, projection=None, created_from=None, created_to=None):
+        query = {}
+        if created_from or created_to:
+            query["created_at"] = {}
+            if created_from:
+                query["created_at"]["$gte"] = created_from
+            if created_to:
+                query["created_at"]["$lte"] = created_to
+        docs = await self.col.find(query, projection).to_list(length=None)
+        return [_out(d, "created_by") for d in docs]
+
+    async def list_by_creator(self, user_id, projection=None):
+        docs = await self.col.find({"created_by": ref_match(user_id)}, projection).to_list(length=None)
+        return [_out(d, "created_by") for d in docs]
+
+    async def insert(self, doc):
+        doc = dict(doc, created_by=ref(doc["created_by"]), like_count=doc.get("like_count", 0))
+        res = await self.col.insert_one(doc)
+        await self._count_facets([(f, doc.get(f), 1) for f in FACET_FIELDS])
+        return str(res.inserted_id)
+
+    async def update(self, idea_id, fields):
+        before = await self.col.find_one_and_update(
+            {"_id": ObjectId(idea_id)},
+            {"$set": fields},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        after = {**before, **fields}
+        moved = [f for f in FACET_FIELDS if before.get(f) != after.get(f)]
+        await self._count_facets(
+            [(f, before.get(f), -1) for f in moved] + [(f, after.get(f), 1) for f in moved]
+        )
+        return _out(after, "created_by")
+
+    async def delete(self, idea_id):
+        doc = await self.col.find_one_and_delete({"_id": ObjectId(idea_id)})
+        if doc is not None:
+            await self._count_facets([(f, doc.get(f), -1) for f in FACET_FIELDS])
+        return _out(doc, "created_by")
+
+    async def inc_comment_count(self, idea_id, by=1):
+        await self.col.update_one({"_id": ObjectId(idea_id)}, {"$inc": {"comment_count": by}})
+
+    async def inc_like_count(self, idea_id, by=1):
+        await self.col.update_one({"_id": ObjectId(idea_id)}, {"$inc": {"like_count": by}})
+
+    async def facets(self, filters):
+        # jedan prolaz kroz ideje za sve grupe; svaka grupa dodaje filtere ostalih polja
+        groups = {
+            field: [
+                {"$match": _facet_query(filters, skip=field)},
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+            ]
+            for field in FACET_FIELDS
+        }
+        groups["total"] = [{"$match": _facet_query(filters)}, {"$count": "count"}]
+        pipeline = [{"$match": _range_query(filters)}, {"$facet": groups}]
+        row = (await self.col.aggregate(pipeline).to_list(length=1))[0]
+
+        result = {
+            field: [{"value": r["_id"], "count": r["count"]} for r in row[field] if r["_id"] is not None]
+            for field in FACET_FIELDS
+        }
+        result["total"] = row["total"][0]["count"] if row["total"] else 0
+        return result
+
+    async def facet_totals(self):
+        rows = await self.facets_col.find({"count": {"$gt": 0}}).sort(
+            [("count", -1), ("value", 1)]
+        ).to_list(length=None)
+        result = {field: [] for field in FACET_FIELDS}
+        for r in rows:
+            if r["field"] in result:
+                result[r["field"]].append({"value": r["value"], "count": r["count"]})
+        # market je obavezno polje, zbir po njemu = broj ideja
+        result["total"] = sum(r["count"] for r in result[FACET_FIELDS[0]])
+        return result
+
+    async def browse(self, filters, sort, after, limit, projection=None):
+        key = BROWSE_SORTS[sort]
+        query = {**_range_query(filters), **_facet_query(filters)}
+        if after:
+            value, last_id = after
+            query = {"$and": [query, {"$or": [
+                {key: {"$lt": value}},
+                {key: value, "_id": {"$lt": ObjectId(last_id)}},
+            ]}]}
+        docs = await self.col.find(query, projection).sort(
+            [(key, -1), ("_id", -1)]
+        ).limit(limit).to_list(length=limit)
+        return [_out(d, "created_by") for d in docs]
+
+
+class MongoEvaluationRepository(EvaluationRepository):
+    def __init__(self, col):
+        self.col = col
+
+    async def upsert(self, idea_id, user_id, fields):
+        doc = dict(fields, idea_id=ref(idea_id), user_id=ref(user_id))
+        # _id unapred, da bi i za novu evaluaciju jedan poziv vratio i "pre" i "posle"
+        new_id = ObjectId()
+        before = await self.col.find_one_and_update(
+            {"idea_id": ref_match(idea_id), "user_id": ref_match(user_id)},
+            {"$set": doc, "$setOnInsert": {"_id": new_id, "created_at": new_id.generation_time.replace(tzinfo=None)}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is not None:
+            after = {**before, **doc}
+        else:
+            after = {"_id": new_id, "created_at": new_id.generation_time.replace(tzinfo=None), **doc}
+        return _out(before, "idea_id", "user_id"), _out(after, "idea_id", "user_id")
+
+    async def list(self, projection=None):
+        docs = await self.col.find({}, projection).to_list(length=None)
+        return [_out(d, "idea_id", "user_id") for d in docs]
+
+    async def list_for_idea(self, idea_id, liked_only=False):
+        query = {"idea_id": ref_match(idea_id)}
+        if liked_only:
+            query["liked"] = True
+        docs = await self.col.find(query).to_list(length=None)
+        return [_out(d, "idea_id", "user_id") for d in docs]
+
+    async def count_likes(self, idea_id):
+        return await self.col.count_documents({"idea_id": ref_match(idea_id), "liked": True})
+
+    async def totals_for_ideas(self, idea_ids):
+        idea_ids = {str(i) for i in idea_ids}
+        if not idea_ids:
+            return {}
+        # jedan $group za sve ideje, idea_id moze biti sacuvan i kao ObjectId i kao string
+        pipeline = [
+            {"$match": {"idea_id": {"$in": _oids(idea_ids) + list(idea_ids)}}},
+            {"$group": {
+                "_id": {"$toString": "$idea_id"},
+                "likes": {"$sum": {"$cond": [{"$eq": ["$liked", True]}, 1, 0]}},
+                "score_sum": {"$sum": {"$cond": [{"$isNumber": "$score"}, "$score", 0]}},
+                "score_count": {"$sum": {"$cond": [{"$isNumber": "$score"}, 1, 0]}},
+            }},
+        ]
+        rows = await self.col.aggregate(pipeline).to_list(length=None)
+        return {r.pop("_id"): r for r in rows}
+
+
+class MongoCommentRepository(CommentRepository):
+    def __init__(self, col):
+        self.col = col
+
+    async def get(self, comment_id, idea_id):
+        oid = _oid(comment_id)
+        if oid is None:
+            return None
+        doc = await self.col.find_one({"_id": oid, "idea_id": ref_match(idea_id)})
+        return _out(doc, "idea_id", "user_id", "parent_id")
+
+    async def insert(self, doc):
+        doc = dict(
+            doc,
+            idea_id=ref(doc["idea_id"]),
+            user_id=ref(doc["user_id"]),
+            parent_id=ref(doc.get("parent_id")),
+        )
+        res = await self.col.insert_one(doc)
+        return str(res.inserted_id)
+
+    async def page(self, idea_id, parent_id, after, limit):
+        query = {"idea_id": ref_match(idea_id), "parent_id": ref_match(parent_id)}
+        if after:
+            created_at, last_id = after
+            query["$or"] = [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "_id": {"$gt": ObjectId(last_id)}},
+            ]
+        docs = await self.col.find(query).sort(
+            [("created_at", 1), ("_id", 1)]
+        ).limit(limit).to_list(length=limit)
+        return [_out(d, "idea_id", "user_id", "parent_id") for d in docs]
+
+    async def inc_reply_count(self, comment_id, by=1):
+        await self.col.update_one({"_id": ObjectId(comment_id)}, {"$inc": {"reply_count": by}})
+
+    async def upsert_for_evaluation(self, evaluation, created_at):
+        before = await self.col.find_one_and_update(
+            {"evaluation_id": ref_match(evaluation["_id"])},
+            {
+                "$set": {"text": evaluation["comment"]},
+                "$setOnInsert": {
+                    "evaluation_id": ref(evaluation["_id"]),
+                    "idea_id": ref(evaluation["idea_id"]),
+                    "user_id": ref(evaluation["user_id"]),
+                    "parent_id": None,
+                    "reply_count": 0,
+                    "created_at": created_at,
+                },
+            },
+            upsert=True,
+            projection={"_id": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        return before is None
+
+
+class MongoNotificationRepository(NotificationRepository):
+    def __init__(self, col):
+        self.col = col
+
+    async def insert_many(self, docs):
+        await self.col.insert_many([dict(d) for d in docs], ordered=False)
+
+    async def pending(self, recipients, after_id, limit):
+        docs = await self.col.find({
+            "recipient": {"$in": list(recipients)},
+            "delivered": False,
+            "_id": {"$gt": ObjectId(after_id)},
+        }).sort("_id", 1).limit(limit).to_list(length=limit)
+        return [_out(d) for d in docs]
+
+    async def undelivered(self, recipient, limit):
+        docs = await self.col.find(
+            {"recipient": recipient, "delivered": False}
+        ).sort("_id", 1).limit(limit).to_list(length=limit)
+        return [_out(d) for d in docs]
+
+    async def list_for(self, recipient, unread_only, limit):
+        query = {"recipient": recipient}
+        if unread_only:
+            query["read"] = False
+        docs = await self.col.find(query).sort("created_at", -1).limit(limit).to_list(length=limit)
+        return [_out(d) for d in docs]
+
+    async def mark_delivered(self, ids):
+        ids = _oids(ids)
+        if ids:
+            await self.col.update_many({"_id": {"$in": ids}}, {"$set": {"delivered": True}})
+
+    async def mark_read(self, recipient, ids=None):
+        query = {"recipient": recipient, "read": False}
+        if ids is not None:
+            query["_id"] = {"$in": _oids(ids)}
+        res = await self.col.update_many(query, {"$set": {"read": True, "delivered": True}})
+        return res.modified_count
+
+
+class MongoActivityRepository(ActivityRepository):
+    def __init__(self, col):
+        self.col = col
+
+    async def increment(self, at, counters):
+        hour = f"{at.hour:02d}"
+        inc = {}
+        for name, by in counters.items():
+            inc[name] = by
+            inc[f"hours.{hour}.{name}"] = by
+        if inc:
+            await self.col.update_one({"_id": at.strftime("%Y-%m-%d")}, {"$inc": inc}, upsert=True)
+
+    async def days(self, first, last):
+        # "YYYY-MM-DD" se sortira isto kao datum, _id indeks je dovoljan
+        return await self.col.find({"_id": {"$gte": first, "$lte": last}}).sort("_id", 1).to_list(length=None)
+
+
+def create_mongo_repositories(db=None):
+    from repositories import Repositories
+
+    if db is None:
+        from database import get_db
+        db = get_db()
+
+    return Repositories(
+        backend="mongo",
+        users=MongoUserRepository(db["users"], db["follows"]),
+        ideas=MongoIdeaRepository(db["ideas"], db["idea_facets"]),
+        evaluations=MongoEvaluationRepository(db["evaluations"]),
+        comments=MongoCommentRepository(db["comments"]),
+        notifications=MongoNotificationRepository(db["notifications"]),
+        activity=MongoActivityRepository(db["activity"]),
+    )
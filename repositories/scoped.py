@@ -0,0 +1,107 @@
+import asyncio
+import copy
+from collections.abc import Iterator
+from contextvars import ContextVar
+
+# Kes pretraga vezan za jedan zahtev (npr. POST /batch).
+# Pod-zahtevi koji se izvrsavaju paralelno dele rezultate citanja iz repozitorijuma:
+# isti upit ide u bazu jednom, ostali cekaju isti task i dobijaju svoju kopiju.
+# Van scope-a sve radi kao ranije, bez kesiranja. Notifikacije i aktivnost se ne kesiraju.
+
+READ_METHODS = frozenset({
+    "get",
+    "get_by_email",
+    "get_by_username",
+    "usernames_by_ids",
+    "existing_usernames",
+    "list",
+    "list_by_creator",
+    "list_for_idea",
+    "count_likes",
+    "totals_for_ideas",
+    "page",
+    "facets",
+    "facet_totals",
+    "browse",
+})
+
+_lookups: ContextVar[dict | None] = ContextVar("lookups", default=None)
+_REPOSITORIES_KEY = "__repositories__"
+
+
+class lookup_scope:
+    """with lookup_scope(): ... -> sva citanja u tom kontekstu (i taskovima iz njega) se dele."""
+
+    def __enter__(self):
+        self._token = _lookups.set({})
+        return self
+
+    def __exit__(self, *exc):
+        _lookups.reset(self._token)
+
+
+async def memoize(key, factory):
+    """Vraca rezultat factory() jednom po scope-u; bez scope-a samo poziva factory()."""
+    lookups = _lookups.get()
+    if lookups is None:
+        return await factory()
+
+    task = lookups.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        lookups[key] = task
+    # routeri menjaju vracene dict-ove, svako dobija svoju kopiju
+    return copy.deepcopy(await asyncio.shield(task))
+
+
+def _materialize(value):
+    # generator se trosi jednom, a repr mu nosi adresu koju kasniji generator moze da dobije
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value, key=repr))
+    if isinstance(value, Iterator):
+        return tuple(value)
+    return value
+
+
+class _ScopedRepository:
+    def __init__(self, name: str, repo):
+        self._name = name
+        self._repo = repo
+
+    def __getattr__(self, attr):
+        method = getattr(self._repo, attr)
+        if attr not in READ_METHODS:
+            return method
+
+        async def cached(*args, **kwargs):
+            args = tuple(_materialize(a) for a in args)
+            kwargs = {k: _materialize(v) for k, v in kwargs.items()}
+            key = (self._name, attr, repr(args), repr(sorted(kwargs.items())))
+            if " at 0x" in key[2] or " at 0x" in key[3]:
+                # argument bez stabilnog repr-a (objekat sa adresom) -> bez kesiranja
+                return await method(*args, **kwargs)
+            return await memoize(key, lambda: method(*args, **kwargs))
+
+        return cached
+
+
+def scoped(repositories):
+    """Repositories cija citanja idu kroz kes aktivnog scope-a."""
+    from repositories import Repositories
+
+    lookups = _lookups.get()
+    if lookups is None:
+        return repositories
+
+    wrapped = lookups.get(_REPOSITORIES_KEY)
+    if wrapped is None:
+        wrapped = lookups[_REPOSITORIES_KEY] = Repositories(
+            backend=repositories.backend,
+            users=_ScopedRepository("users", repositories.users),
+            ideas=_ScopedRepository("ideas", repositories.ideas),
+            evaluations=_ScopedRepository("evaluations", repositories.evaluations),
+            comments=_ScopedRepository("comments", repositories.comments),
+            notifications=repositories.notifications,
+            activity=repositories.activity,
+        )
+    return wrapped
@@ -0,0 +1,40 @@
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from activity import MAX_DAYS, MAX_HOURLY_DAYS, activity_report
+from admission import admission
+from routers.auth import admin_required
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/stats/activity")
+async def get_activity_stats(
+    start: date | None = Query(None, alias="from", description="Prvi dan (YYYY-MM-DD), podrazumevano pre 30 dana"),
+    end: date | None = Query(None, alias="to", description="Poslednji dan (YYYY-MM-DD), podrazumevano danas"),
+    granularity: Literal["day", "hour"] = Query("day"),
+    current_user=Depends(admin_required),
+):
+    """
+    Broj novih ideja, evaluacija, lajkova i pracenja po danu (ili satu), UTC.
+    Cita samo dnevne bucket-e, pa cena zavisi od broja dana a ne od broja dogadjaja.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(400, "'from' mora biti pre 'to'")
+
+    days = (end - start).days + 1
+    limit = MAX_HOURLY_DAYS if granularity == "hour" else MAX_DAYS
+    if days > limit:
+        raise HTTPException(400, f"Najvise {limit} dana za granularity={granularity}")
+
+    return await activity_report(start, end, granularity)
+
+
+@router.get("/stats/admission")
+async def get_admission_stats(current_user=Depends(admin_required)):
+    """Stanje admission kontrole po klasi: aktivni, u redu, primljeni i odbijeni zahtevi (ovaj worker)."""
+    return admission.snapshot()
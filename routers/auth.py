@@ -1,28 +1,32 @@
 import bcrypt
 from bson import ObjectId
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from auth.dependencies import get_current_user
 from models import UserIn, UserLogin
-from database import users_col
+from repositories import UserRepository, get_user_repo
 from auth.security import hash_password, verify_password
 from auth.jwt_handler import create_access_token
+from cache import publish_change
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
  
 @router.post("/register")
-async def register(user: UserIn):
-    if await users_col.find_one({"email": user.email}):
+async def register(user: UserIn, users: UserRepository = Depends(get_user_repo)):
+    if await users.get_by_email(user.email):
         raise HTTPException(status_code=400, detail="Email već postoji")
 
     user_dict = user.dict()
-    hashed_password = bcrypt.hashpw(user_dict["password"].encode(), bcrypt.gensalt())
+    # bcrypt u threadpool-u, ne blokira event loop
+    hashed_password = await run_in_threadpool(bcrypt.hashpw, user_dict["password"].encode(), bcrypt.gensalt())
     user_dict["password"] = hashed_password.decode()
 
     user_dict["role"] = "user"  # <-- postavi default rolu
 
-    res = await users_col.insert_one(user_dict)
-    return {"msg": "Registracija uspešna", "user_id": str(res.inserted_id)}
+    user_id = await users.insert(user_dict)
+    publish_change("users", user_id)
+    return {"msg": "Registracija uspešna", "user_id": user_id}
 
 
 # @router.post("/login")
@@ -36,14 +40,14 @@ async def register(user: UserIn):
 #     return {"access_token": token, "token_type": "bearer"}
 
 @router.post("/login")
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), users: UserRepository = Depends(get_user_repo)):
     print("Login attempt for:", form_data.username)
-    user = await users_col.find_one({"email": form_data.username})
+    user = await users.get_by_email(form_data.username)
     print("User found:", user)
     if not user:
         raise HTTPException(status_code=401, detail="Pogrešan email ili lozinka")
 
-    if not verify_password(form_data.password, user["password"]):
+    if not await run_in_threadpool(verify_password, form_data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Pogrešan email ili lozinka")
 
     access_token = create_access_token(data={"sub": str(user["_id"])})
@@ -55,7 +59,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 #--------------------------------------------------------------------------------
 
-def admin_required(current_user=Depends(get_current_user)):
+async def admin_required(current_user=Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Samo admin ima pristup ovoj ruti.")
     return current_user
@@ -66,10 +70,11 @@ async def admin_test(current_user=Depends(admin_required)):
 
 
 @router.post("/set-admin/{user_id}/")
-async def set_admin(user_id: str):
+async def set_admin(user_id: str, users: UserRepository = Depends(get_user_repo)):
     if not ObjectId.is_valid(user_id):
         raise HTTPException(404, "invalid id")
     
     #user_id = current_user["id"]
-    await users_col.update_one({"_id": ObjectId(user_id)}, {"$set": {"role": "admin"}})
+    await users.update(user_id, {"role": "admin"})
+    publish_change("users", user_id)
     return {"msg": "Sada si admin!"}
@@ -0,0 +1,138 @@
+import asyncio
+import json
+from typing import Any, List
+from urllib.parse import unquote, urlsplit
+
+from fastapi import APIRouter, Body, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field
+from starlette.exceptions import HTTPException
+
+from admission import admission, client_key
+from repositories import lookup_scope
+
+# POST /batch: vise GET poziva u jednom HTTP zahtevu (npr. profil strana na mobilnom).
+# Pod-zahtevi idu direktno kroz app.router, paralelno (asyncio.gather), sa zajednickim
+# kesom citanja i jednom proverom tokena. Svaka stavka ima svoj status, greska jedne
+# ne obara ostale. Skupe stavke (npr. /ideas/) prolaze admission kontrolu kao zasebni
+# zahtevi: trose token klijenta i mesto u semaforu svoje klase, odbijene dobijaju 429/503.
+
+MAX_BATCH_SIZE = 20
+BATCH_CONCURRENCY = 6     # max pod-zahteva koji se izvrsavaju istovremeno
+FORWARDED_HEADERS = (b"authorization", b"accept-language")
+
+router = APIRouter(tags=["Batch"])
+
+
+class BatchItem(BaseModel):
+    method: str = "GET"
+    path: str = Field(..., examples=["/users/followers/marko"])
+
+
+class BatchIn(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchResult(BaseModel):
+    status: int
+    body: Any = None
+
+
+def _sub_scope(parent: dict, raw_path: str, query: str) -> dict:
+    headers = [(k, v) for k, v in parent["headers"] if k in FORWARDED_HEADERS]
+    headers.append((b"accept", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": parent.get("asgi", {"version": "3.0"}),
+        "http_version": parent.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": parent.get("scheme", "http"),
+        "server": parent.get("server"),
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        # kao ASGI server: path je dekodiran (%20 -> razmak), raw_path ostaje kako je poslat
+        "path": unquote(raw_path),
+        "raw_path": raw_path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "app": parent.get("app"),
+        "state": {},
+    }
+    # exception handleri aplikacije -> HTTPException postaje normalan JSON odgovor
+    if "starlette.exception_handlers" in parent:
+        scope["starlette.exception_handlers"] = parent["starlette.exception_handlers"]
+    return scope
+
+
+async def _call(app, scope: dict) -> BatchResult:
+    status = 500
+    chunks = []
+    content_type = b""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except HTTPException as e:
+        # i starlette 404 (nepostojeca putanja), ne samo fastapi.HTTPException
+        return BatchResult(status=e.status_code, body={"detail": e.detail})
+    except RequestValidationError as e:
+        return BatchResult(status=422, body={"detail": e.errors()})
+
+    raw = b"".join(chunks)
+    if content_type.startswith(b"application/json") and raw:
+        return BatchResult(status=status, body=json.loads(raw))
+    return BatchResult(status=status, body=raw.decode(errors="replace") or None)
+
+
+async def _admitted_call(request: Request, client: str, raw_path: str, query: str) -> BatchResult:
+    cost_name = admission.cost_of("GET", unquote(raw_path))
+    if cost_name is not None:
+        rejected = await admission.admit(cost_name, client)
+        if rejected:
+            status, _, detail = rejected
+            return BatchResult(status=status, body={"detail": detail})
+    try:
+        return await _call(request.app.router, _sub_scope(request.scope, raw_path, query))
+    finally:
+        if cost_name is not None:
+            admission.release(cost_name)
+
+
+async def _run_item(request: Request, client: str, item: BatchItem, semaphore: asyncio.Semaphore) -> BatchResult:
+    if item.method.upper() != "GET":
+        return BatchResult(status=405, body={"detail": "Batch podrzava samo GET zahteve"})
+
+    url = urlsplit(item.path)
+    if not url.path.startswith("/") or url.scheme or url.netloc:
+        return BatchResult(status=400, body={"detail": "Putanja mora biti relativna (npr. /ideas/)"})
+    if unquote(url.path).rstrip("/") == "/batch":
+        return BatchResult(status=400, body={"detail": "Batch ne moze da poziva sam sebe"})
+
+    async with semaphore:
+        try:
+            return await _admitted_call(request, client, url.path, url.query)
+        except Exception as e:
+            return BatchResult(status=500, body={"detail": f"Neočekivana greška: {e}"})
+
+
+@router.post("/batch", response_model=List[BatchResult])
+async def batch(request: Request, payload: BatchIn = Body(...)):
+    """
+    Izvrsava do MAX_BATCH_SIZE GET zahteva odjednom. Rezultati su u istom redosledu kao zahtevi.
+    Authorization header batch zahteva vazi za sve stavke.
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    client = client_key(request.scope, request.headers)
+    with lookup_scope():
+        # gather kopira kontekst -> svi pod-zahtevi vide isti kes citanja
+        return await asyncio.gather(*(_run_item(request, client, item, semaphore) for item in payload.requests))
@@ -0,0 +1,55 @@
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth.dependencies import get_current_user
+from comments import MAX_PAGE_SIZE, PAGE_SIZE, add_comment, list_comments
+from models import CommentDB, CommentIn, CommentPage, UserDB
+from repositories import CommentRepository, IdeaRepository, get_comment_repo, get_idea_repo
+
+router = APIRouter(prefix="/ideas", tags=["Comments"])
+
+
+@router.post("/{idea_id}/comments", response_model=CommentDB, status_code=201)
+async def create_comment(
+    idea_id: str,
+    comment: CommentIn,
+    current_user: UserDB = Depends(get_current_user),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+    comments: CommentRepository = Depends(get_comment_repo),
+):
+    if not ObjectId.is_valid(idea_id):
+        raise HTTPException(400, "Invalid idea_id")
+
+    idea = await ideas.get(idea_id, {"created_by": 1, "title": 1})
+    if not idea:
+        raise HTTPException(404, "Ideja ne postoji")
+
+    parent = None
+    if comment.parent_id:
+        parent = await comments.get(comment.parent_id, idea_id)
+        if not parent:
+            raise HTTPException(404, "Komentar na koji odgovaraš ne postoji")
+
+    user = {"_id": current_user.id, "username": current_user.username}
+    doc = await add_comment(idea, user, comment.text, parent)
+    return CommentDB(**doc)
+
+
+@router.get("/{idea_id}/comments", response_model=CommentPage)
+async def get_comments(
+    idea_id: str,
+    parent_id: str | None = Query(None, description="Vrati odgovore na ovaj komentar umesto komentara najvišeg nivoa"),
+    cursor: str | None = Query(None, description="next_cursor iz prethodne strane"),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    if not ObjectId.is_valid(idea_id):
+        raise HTTPException(400, "Invalid idea_id")
+    if parent_id is not None and not ObjectId.is_valid(parent_id):
+        raise HTTPException(400, "Invalid parent_id")
+
+    try:
+        docs, next_cursor = await list_comments(idea_id, parent_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    return CommentPage(items=[CommentDB(**d) for d in docs], next_cursor=next_cursor)
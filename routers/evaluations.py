@@ -1,16 +1,31 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from bson import ObjectId
 from bson.errors import InvalidId
-from pymongo import ReturnDocument
 
-from database import users_col, ideas_col, evaluations_col
 from models import Evaluation, EvaluationDB
+from notifications import emit
+from activity import record_activity
+from cache import publish_change
+from comments import upsert_evaluation_comment
+from fieldsets import FieldSelection, field_selection
+from repositories import (
+    EvaluationRepository, IdeaRepository, UserRepository,
+    get_evaluation_repo, get_idea_repo, get_user_repo,
+)
 
 router = APIRouter(prefix="/evaluations", tags=["Evaluations"])
 
+evaluation_fields = field_selection(EvaluationDB)
+
 
 @router.post("/", response_model=EvaluationDB)
-async def evaluate_idea(eval: Evaluation):
+async def evaluate_idea(
+    eval: Evaluation,
+    users: UserRepository = Depends(get_user_repo),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+    evaluations: EvaluationRepository = Depends(get_evaluation_repo),
+):
     """
     Korisnik ocenjuje / lajkuje / komentariše ideju.
     Sve je opciono: score, liked, comment.
@@ -18,74 +33,95 @@ async def evaluate_idea(eval: Evaluation):
     Ako ne postoji → kreira novu.
     """
     try:
-        user_obj_id = ObjectId(eval.user_id)
-        idea_obj_id = ObjectId(eval.idea_id)
+        user_id = str(ObjectId(eval.user_id))
+        idea_id = str(ObjectId(eval.idea_id))
     except InvalidId:
         raise HTTPException(status_code=400, detail="Nevalidan ID korisnika ili ideje")
 
     # Provera postojanja korisnika
-    if not await users_col.find_one({"_id": user_obj_id}):
+    user = await users.get(user_id, {"username": 1})
+    if not user:
         raise HTTPException(404, "Korisnik ne postoji")
 
     # Provera postojanja ideje
-    idea = await ideas_col.find_one({"_id": idea_obj_id})
+    idea = await ideas.get(idea_id, {"created_by": 1, "title": 1})
     if not idea:
         raise HTTPException(404, "Ideja ne postoji")
 
     # Zabrani samoevaluaciju
-    if idea.get("created_by") == str(user_obj_id):
+    if idea.get("created_by") == user_id:
         raise HTTPException(status_code=400, detail="Ne možeš oceniti svoju ideju")
 
     # Ukloni None vrednosti (da se ne prepisuje postojećim null-om)
-    doc = eval.model_dump(exclude_none=True)
-    doc["idea_id"] = str(idea_obj_id)
-    doc["user_id"] = str(user_obj_id)
+    doc = eval.model_dump(exclude_none=True, exclude={"idea_id", "user_id"})
 
     # Upsert (update or insert)
-    result = await evaluations_col.find_one_and_update(
-        {"idea_id": doc["idea_id"], "user_id": doc["user_id"]},
-        {"$set": doc},
-        upsert=True,
-        return_document=ReturnDocument.AFTER
-    )
-
-    result["_id"] = str(result["_id"])
+    before, result = await evaluations.upsert(idea_id, user_id, doc)
+
+    publish_change("evaluations", result["_id"], result)
+
+    # denormalizovan broj lajkova na ideji (browse/facets filtriraju i sortiraju po njemu)
+    was_liked = bool(before and before.get("liked") is True)
+    is_liked = result.get("liked") is True
+    if was_liked != is_liked:
+        await ideas.inc_like_count(idea_id, 1 if is_liked else -1)
+        publish_change("ideas", idea_id, idea)
+    # dogadjaji: nova evaluacija, novi lajk (otlajkovanje se ne broji)
+    await record_activity(evaluations=int(before is None), likes=int(is_liked and not was_liked))
+    if result.get("comment"):
+        await upsert_evaluation_comment(result)
+
+    # notifikacija autoru ideje
+    author = await users.get(idea["created_by"], {"username": 1})
+    if author:
+        await emit(
+            "evaluation",
+            [author["username"]],
+            actor=user["username"],
+            idea_id=idea_id,
+            idea_title=idea.get("title"),
+            liked=doc.get("liked"),
+            score=doc.get("score"),
+            comment=doc.get("comment"),
+        )
+
     return EvaluationDB(**result)
 
 
 @router.get("/getall/", response_model=list[EvaluationDB])
-async def get_all_evaluations():
+async def get_all_evaluations(
+    sel: FieldSelection = Depends(evaluation_fields),
+    evaluations: EvaluationRepository = Depends(get_evaluation_repo),
+):
     """
     Vrati sve evaluacije.
     """
     docs = []
-    async for ev in evaluations_col.find():
-        ev["_id"] = str(ev["_id"])
-        if "idea_id" in ev:
-            ev["idea_id"] = str(ev["idea_id"])
-        if "user_id" in ev:
-            ev["user_id"] = str(ev["user_id"])
+    for ev in await evaluations.list(sel.projection):
         try:
-            docs.append(EvaluationDB(**ev))
+            docs.append(sel.dump(ev))
         except Exception:
             continue
 
     if not docs:
         raise HTTPException(404, "Jos uvek nema evidentiranog ocenjivanja")
-    return docs
+    return JSONResponse(docs)
 
 
 @router.get("/vratisveocene/{idea_id}")
-async def vratisveocene(idea_id: str):
+async def vratisveocene(
+    idea_id: str,
+    users: UserRepository = Depends(get_user_repo),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+    evaluations: EvaluationRepository = Depends(get_evaluation_repo),
+):
     """
     Vrati sve evaluacije za datu ideju + prosečnu ocenu.
     """
     if not ObjectId.is_valid(idea_id):
         raise HTTPException(400, "invalid idea_id")
 
-    eval_docs = []
-    async for doc in evaluations_col.find({"idea_id": idea_id}):
-        eval_docs.append(doc)
+    eval_docs = await evaluations.list_for_idea(idea_id)
 
     if not eval_docs:
         raise HTTPException(404, "No evaluations found for this idea")
@@ -93,28 +129,15 @@ async def vratisveocene(idea_id: str):
     ocene = [doc.get("score") for doc in eval_docs if isinstance(doc.get("score"), (int, float))]
     prosek = round(sum(ocene) / len(ocene), 2) if ocene else 0
 
+    # korisnici jednim upitom, ideja je ista za sve evaluacije
+    usernames = await users.usernames_by_ids(e["user_id"] for e in eval_docs)
+    idea = await ideas.get(idea_id, {"title": 1})
+    idea_title = idea["title"] if idea and "title" in idea else "Nepoznata ideja"
+
     result = []
     for eval_doc in eval_docs:
-        # korisnik
-        username = "Nepoznat korisnik"
-        try:
-            user = await users_col.find_one({"_id": ObjectId(eval_doc["user_id"])})
-            if user and "username" in user:
-                username = user["username"]
-        except Exception:
-            pass
-
-        # ideja
-        idea_title = "Nepoznata ideja"
-        try:
-            idea = await ideas_col.find_one({"_id": ObjectId(eval_doc["idea_id"])})
-            if idea and "title" in idea:
-                idea_title = idea["title"]
-        except Exception:
-            pass
-
         result.append({
-            "Korisnik": username,
+            "Korisnik": usernames.get(eval_doc["user_id"], "Nepoznat korisnik"),
             "Naziv ideje": idea_title,
             "Ocena": eval_doc.get("score"),
             "Komentar": eval_doc.get("comment", ""),
@@ -125,33 +148,31 @@ async def vratisveocene(idea_id: str):
 
 
 @router.get("/likes/count/{idea_id}")
-async def get_likes_count(idea_id: str):
+async def get_likes_count(idea_id: str, evaluations: EvaluationRepository = Depends(get_evaluation_repo)):
     """
     Broj lajkova za ideju.
     """
     if not ObjectId.is_valid(idea_id):
         raise HTTPException(400, "invalid idea_id")
 
-    like_count = await evaluations_col.count_documents({"idea_id": idea_id, "liked": True})
+    like_count = await evaluations.count_likes(idea_id)
     return {"idea_id": idea_id, "like_count": like_count}
 
 
 @router.get("/likes/usernames/{idea_id}")
-async def get_usernames_who_liked(idea_id: str):
+async def get_usernames_who_liked(
+    idea_id: str,
+    users: UserRepository = Depends(get_user_repo),
+    evaluations: EvaluationRepository = Depends(get_evaluation_repo),
+):
     """
     Usernames korisnika koji su lajkovali ideju.
     """
     if not ObjectId.is_valid(idea_id):
         raise HTTPException(400, "invalid idea_id")
 
-    usernames = []
-    async for ev in evaluations_col.find({"idea_id": idea_id, "liked": True}):
-        user_id = ev.get("user_id")
-        try:
-            user = await users_col.find_one({"_id": ObjectId(user_id)})
-            if user and "username" in user:
-                usernames.append(user["username"])
-        except Exception:
-            continue
+    liked = await evaluations.list_for_idea(idea_id, liked_only=True)
+    names = await users.usernames_by_ids(ev["user_id"] for ev in liked if ev.get("user_id"))
+    usernames = [names[ev["user_id"]] for ev in liked if ev.get("user_id") in names]
 
     return {"idea_id": idea_id, "liked_usernames": usernames}
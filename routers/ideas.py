@@ -1,140 +1,216 @@
 import datetime
 from datetime import datetime as dt
-from typing import List, Optional
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from bson import ObjectId
 from fastapi.responses import JSONResponse
 from pymongo.errors import DuplicateKeyError
 from auth.dependencies import get_current_user
-from database import users_col, ideas_col, evaluations_col
-
-from models import Idea, IdeaDB, IdeaUpdate, UserDB
+from notifications import emit
+from activity import record_activity
+from cache import publish_change
+from repositories import (
+    EvaluationRepository, IdeaRepository, UserRepository,
+    get_evaluation_repo, get_idea_repo, get_user_repo,
+)
+
+from models import Idea, IdeaDB, IdeaFacets, IdeaPage, IdeaUpdate, UserDB
+from fieldsets import FieldSelection, field_selection
+from facets import MAX_PAGE_SIZE, PAGE_SIZE, browse_ideas, clean_filters, idea_facets
 
 router = APIRouter(prefix="/ideas", tags=["Ideas"])
 
+idea_fields = field_selection(IdeaDB)
+
 
 @router.post("/", response_model=IdeaDB, status_code=201)
-async def create_idea(idea: Idea, current_user: UserDB = Depends(get_current_user)):
+async def create_idea(
+    idea: Idea,
+    current_user: UserDB = Depends(get_current_user),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+):
     idea_dict = idea.model_dump(exclude={"created_by"})
     idea_dict["created_by"] = str(current_user.id)
 
     try:
-        res = await ideas_col.insert_one(idea_dict)
-        idea_dict["_id"] = str(res.inserted_id)
-        return IdeaDB(**idea_dict)
+        idea_dict["_id"] = await ideas.insert(idea_dict)
     except Exception as e:
         raise HTTPException(500, f"Greška prilikom kreiranja ideje: {str(e)}")
+    publish_change("ideas", idea_dict["_id"], idea_dict)
+    await record_activity(ideas=1)
+
+    # javi pratiocima da je objavljena nova ideja
+    await emit(
+        "new_idea",
+        current_user.followers,
+        actor=current_user.username,
+        idea_id=idea_dict["_id"],
+        title=idea_dict["title"],
+    )
+    return IdeaDB(**idea_dict)
+
+
+# /facets i /browse moraju pre /{idea_id}
+@router.get("/facets", response_model=IdeaFacets)
+async def get_idea_facets(
+    market: str | None = Query(None, description="Brojevi za target_audience samo unutar ovog marketa"),
+    target_audience: str | None = Query(None, description="Brojevi za market samo za ovu publiku"),
+    min_created_at: dt | None = Query(None, description="Minimalni datum kreiranja (ISO format)"),
+    max_created_at: dt | None = Query(None, description="Maksimalni datum kreiranja (ISO format)"),
+    min_likes: int = Query(0, ge=0, description="Minimalan broj lajkova"),
+):
+    """
+    Broj ideja po marketu i ciljnoj publici. Brojevi za jedno polje ne primenjuju
+    filter tog istog polja, pa klijent moze da prikaze sve opcije za dalje filtriranje.
+    """
+    filters = clean_filters(
+        market=market,
+        target_audience=target_audience,
+        created_from=min_created_at,
+        created_to=max_created_at,
+        min_likes=min_likes,
+    )
+    return await idea_facets(filters)
+
+
+@router.get("/browse", response_model=IdeaPage)
+async def browse_page(
+    market: str | None = Query(None),
+    target_audience: str | None = Query(None),
+    min_created_at: dt | None = Query(None, description="Minimalni datum kreiranja (ISO format)"),
+    max_created_at: dt | None = Query(None, description="Maksimalni datum kreiranja (ISO format)"),
+    min_likes: int = Query(0, ge=0, description="Minimalan broj lajkova"),
+    sort: Literal["new", "likes"] = Query("new", description="new = najnovije, likes = najvise lajkova"),
+    cursor: str | None = Query(None, description="next_cursor iz prethodne strane"),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    sel: FieldSelection = Depends(idea_fields),
+    users: UserRepository = Depends(get_user_repo),
+):
+    filters = clean_filters(
+        market=market,
+        target_audience=target_audience,
+        created_from=min_created_at,
+        created_to=max_created_at,
+        min_likes=min_likes,
+    )
+    try:
+        docs, next_cursor = await browse_ideas(
+            filters, sort, cursor, limit, sel.with_db_fields("created_by")
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    usernames = {}
+    if sel.wants("author_username"):
+        usernames = await users.usernames_by_ids(d["created_by"] for d in docs if d.get("created_by"))
+    for doc in docs:
+        doc["author_username"] = usernames.get(doc.get("created_by"))
+
+    return JSONResponse({"items": [sel.dump(d) for d in docs], "next_cursor": next_cursor})
 
 
 @router.get("/{idea_id}", response_model=IdeaDB)
-async def get_idea(idea_id: str):
+async def get_idea(
+    idea_id: str,
+    sel: FieldSelection = Depends(idea_fields),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+    users: UserRepository = Depends(get_user_repo),
+):
     if not ObjectId.is_valid(idea_id):
         raise HTTPException(404, "Invalid id")
 
-    result = await ideas_col.find_one({"_id": ObjectId(idea_id)})
+    result = await ideas.get(idea_id, sel.with_db_fields("created_by"))
     if result is None:
         raise HTTPException(404, "Idea doesn't exist")
 
-    # Prebaci _id u string
-    result["_id"] = str(result["_id"])
-
     # Nađi username korisnika koji je kreirao ideju
-    user = await users_col.find_one({"_id": ObjectId(result["created_by"])}, {"username": 1})
-    if user:
-        result["author_username"] = user["username"]
-    else:
-        result["author_username"] = "Nepoznat korisnik"
-
-    # Još uvek vrati i created_by, ali kao string (ako ti treba u frontend-u)
-    result["created_by"] = str(result["created_by"])
+    if sel.wants("author_username"):
+        user = await users.get(result["created_by"], {"username": 1})
+        if user:
+            result["author_username"] = user["username"]
+        else:
+            result["author_username"] = "Nepoznat korisnik"
 
-    return IdeaDB(**result)
+    return JSONResponse(sel.dump(result))
 
 
 @router.get("/", response_model=list[IdeaDB])
-async def get_all_ideas():
-    docs = []
-    async for idea in ideas_col.find():
-        # konverzija ID-ja ideje
-        idea["_id"] = str(idea["_id"])
+async def get_all_ideas(
+    sel: FieldSelection = Depends(idea_fields),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+    users: UserRepository = Depends(get_user_repo),
+):
+    docs = await ideas.list(sel.with_db_fields("created_by"))
+    if not docs:
+        raise HTTPException(404, "Jos uvek nisu dodate ideje")
 
+    # jedan upit za sve autore umesto po jednog za svaku ideju
+    usernames = {}
+    if sel.wants("author_username"):
+        usernames = await users.usernames_by_ids(i["created_by"] for i in docs if i.get("created_by"))
+
+    result = []
+    for idea in docs:
         # ako postoji created_by, izvuci username
         if "created_by" in idea:
-            creator_id = idea["created_by"]
-            if isinstance(creator_id, ObjectId):
-                creator_id = str(creator_id)
-            idea["created_by"] = creator_id
-
-            # nadji usera u users_col
-            user = await users_col.find_one({"_id": ObjectId(creator_id)}, {"username": 1})
-            if user:
-                idea["author_username"] = user.get("username")
-            else:
-                idea["author_username"] = None
+            idea["author_username"] = usernames.get(idea["created_by"])
         else:
             idea["author_username"] = None
 
-        docs.append(idea)
+        result.append(sel.dump(idea))
 
-    if not docs:
-        raise HTTPException(404, "Jos uvek nisu dodate ideje")
-
-    return docs
+    return JSONResponse(result)
 
 @router.get("/userideas/{user_id}/", response_model=list[IdeaDB])
-async def get_user_ideas(user_id: str):
+async def get_user_ideas(
+    user_id: str,
+    sel: FieldSelection = Depends(idea_fields),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+):
     if not ObjectId.is_valid(user_id):
         raise HTTPException(400, "Nevalidan id korisnika")
 
-    ideas = []
-    async for idea in ideas_col.find({"created_by": user_id}):
-        idea["_id"] = str(idea["_id"])
-        idea["created_by"] = str(idea["created_by"])
-        ideas.append(IdeaDB(**idea))
+    result = [sel.dump(idea) for idea in await ideas.list_by_creator(user_id, sel.projection)]
 
-    if not ideas:
+    if not result:
         raise HTTPException(404, "Nema ideja tog korisnika")
-    return ideas
+    return JSONResponse(result)
 
 
 @router.delete("/{idea_id}", status_code=204)
-async def delete_idea(idea_id: str):
+async def delete_idea(idea_id: str, ideas: IdeaRepository = Depends(get_idea_repo)):
     if not ObjectId.is_valid(idea_id):
         raise HTTPException(400, "Invalid idea_id")
 
-    res = await ideas_col.delete_one({"_id": ObjectId(idea_id)})
-    if res.deleted_count == 0:
+    deleted = await ideas.delete(idea_id)
+    if deleted is None:
         raise HTTPException(404, detail="Ideja nije pronađena")
+    publish_change("ideas", idea_id, deleted)
 
 
 @router.patch("/{idea_id}", response_model=IdeaDB)
 async def update_idea_patch(
     idea_id: str,
     ideaupdate: IdeaUpdate,
-    current_user: UserDB = Depends(get_current_user)
+    current_user: UserDB = Depends(get_current_user),
+    ideas: IdeaRepository = Depends(get_idea_repo),
 ):
     if not ObjectId.is_valid(idea_id):
         raise HTTPException(404, "Nevažeći ID.")
 
-    existing_idea = await ideas_col.find_one({"_id": ObjectId(idea_id)})
+    existing_idea = await ideas.get(idea_id, {"created_by": 1})
     if not existing_idea:
         raise HTTPException(404, "Ideja nije pronađena.")
 
-    if str(existing_idea["created_by"]) != str(current_user.id):
+    if existing_idea["created_by"] != str(current_user.id):
         raise HTTPException(403, "Nemaš dozvolu da menjaš ovu ideju.")
 
     update_data = ideaupdate.model_dump(exclude_none=True, exclude_unset=True)
     if not update_data:
         raise HTTPException(400, "Nema podataka za ažuriranje.")
 
-    await ideas_col.update_one(
-        {"_id": ObjectId(idea_id)},
-        {"$set": update_data}
-    )
-
-    updated_idea = await ideas_col.find_one({"_id": ObjectId(idea_id)})
-    updated_idea["_id"] = str(updated_idea["_id"])
-    updated_idea["created_by"] = str(updated_idea["created_by"])
+    updated_idea = await ideas.update(idea_id, update_data)
+    publish_change("ideas", idea_id, updated_idea)
     return IdeaDB(**updated_idea)
 
 
@@ -145,6 +221,9 @@ async def filter_ideje(
     min_likes: int = Query(0, description="Minimalan broj lajkova"),
     min_score: float = Query(0.0, description="Minimalna prosečna ocena"),
     min_followers: int = Query(0, description="Minimalan broj pratilaca autora"),
+    ideas: IdeaRepository = Depends(get_idea_repo),
+    evaluations: EvaluationRepository = Depends(get_evaluation_repo),
+    users: UserRepository = Depends(get_user_repo),
 ):
     min_date = None
     max_date = None
@@ -159,36 +238,23 @@ async def filter_ideje(
         except ValueError:
             raise HTTPException(400, "Nevalidan format za max_created_at (ISO string)")
 
-    filter_query = {}
-    if min_date or max_date:
-        filter_query["created_at"] = {}
-        if min_date:
-            filter_query["created_at"]["$gte"] = min_date
-        if max_date:
-            filter_query["created_at"]["$lte"] = max_date
-
-    ideje_cursor = ideas_col.find(filter_query)
     ideje = []
 
-    async for idea in ideje_cursor:
-        idea_id = str(idea["_id"])
-        created_by = str(idea["created_by"])
+    for idea in await ideas.list(created_from=min_date, created_to=max_date):
+        idea_id = idea["_id"]
+        created_by = idea["created_by"]
 
-        num_likes = await evaluations_col.count_documents({
-            "idea_id": idea_id,
-            "liked": True
-        })
+        num_likes = await evaluations.count_likes(idea_id)
         if num_likes < min_likes:
             continue
 
-        eval_cursor = evaluations_col.find({"idea_id": idea_id})
-        ocene = [doc async for doc in eval_cursor]
+        ocene = await evaluations.list_for_idea(idea_id)
         scores = [e.get("score") for e in ocene if isinstance(e.get("score"), (int, float))]
         avg_score = round(sum(scores) / len(scores), 2) if scores else 0
         if avg_score < min_score:
             continue
 
-        user_doc = await users_col.find_one({"_id": ObjectId(created_by)})
+        user_doc = await users.get(created_by, {"followers": 1})
         if not user_doc:
             continue
 
@@ -0,0 +1,69 @@
+import asyncio
+from typing import List, Optional
+from bson import ObjectId
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+
+from auth.dependencies import get_current_user
+from models import UserDB
+from notifications import manager, send_backlog, serialize
+from repositories import NotificationRepository, get_notification_repo
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+ws_router = APIRouter(tags=["Notifications"])
+
+
+@router.get("/")
+async def get_notifications(
+    unread_only: bool = Query(True, description="Samo neprocitane notifikacije"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: UserDB = Depends(get_current_user),
+    notifications: NotificationRepository = Depends(get_notification_repo),
+):
+    rows = await notifications.list_for(current_user.username, unread_only, limit)
+
+    # procitano preko API-ja = isporuceno, ne salji ponovo preko WebSocket-a
+    undelivered = [r["_id"] for r in rows if not r.get("delivered")]
+    if undelivered:
+        await notifications.mark_delivered(undelivered)
+
+    return [serialize(r) for r in rows]
+
+
+@router.post("/read/")
+async def mark_notifications_read(
+    ids: Optional[List[str]] = Body(None, embed=True),
+    current_user: UserDB = Depends(get_current_user),
+    notifications: NotificationRepository = Depends(get_notification_repo),
+):
+    """
+    Oznaci notifikacije kao procitane. Bez `ids` oznacava sve.
+    """
+    if ids is not None and not all(ObjectId.is_valid(i) for i in ids):
+        raise HTTPException(400, "Nevalidan id notifikacije")
+
+    updated = await notifications.mark_read(current_user.username, ids)
+    return {"updated": updated}
+
+
+@ws_router.websocket("/ws/notifications")
+async def notifications_ws(websocket: WebSocket, token: str = Query(...)):
+    # browser ne moze da posalje Authorization header za WebSocket, pa token ide u query
+    try:
+        current_user = await get_current_user(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    conn = manager.connect(websocket, current_user.username)
+    sender = asyncio.create_task(conn.run())
+    try:
+        await send_backlog(conn)
+        while True:
+            # klijent ne salje nista bitno, samo drzimo konekciju otvorenom
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(conn)
+        sender.cancel()
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from bson import ObjectId
 from fastapi.responses import JSONResponse
 from pydantic import EmailStr, ValidationError
@@ -6,12 +7,25 @@ from pymongo.errors import DuplicateKeyError
 import bcrypt
 from auth.dependencies import get_current_user
 from models import UserIn, UserDB, UserPublic, UserUpdate
-from database import users_col, ideas_col
+from notifications import emit
+from activity import record_activity
+from cache import LocalCache, publish_change
+from fieldsets import FieldSelection, field_selection
+from repositories import (
+    EvaluationRepository, IdeaRepository, UserRepository,
+    get_evaluation_repo, get_idea_repo, get_user_repo,
+)
 from datetime import datetime
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+user_fields = field_selection(UserPublic)
+
+# sastavljeni profili po username-u; brisu se na promenu korisnika (profil, follow)
+# i na promenu bilo koje njegove ideje ili njenih evaluacija (vidi cache.REFERENCES)
+profile_cache = LocalCache("profiles", maxsize=2048)
+
 
 @router.get("/me", response_model=UserDB)
 async def get_me(current_user: UserDB = Depends(get_current_user)):
@@ -20,15 +34,15 @@ async def get_me(current_user: UserDB = Depends(get_current_user)):
  
 # ------------------- CREATE -------------------
 @router.post("/", response_model=UserDB, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserIn):
+async def create_user(user: UserIn, users: UserRepository = Depends(get_user_repo)):
     try:
         user_dict = user.model_dump()
         # Hash password pre čuvanja
-        hashed_password = bcrypt.hashpw(user_dict["password"].encode(), bcrypt.gensalt())
+        hashed_password = await run_in_threadpool(bcrypt.hashpw, user_dict["password"].encode(), bcrypt.gensalt())
         user_dict["password"] = hashed_password.decode()
 
-        result = await users_col.insert_one(user_dict)
-        user_dict["_id"] = str(result.inserted_id)
+        user_dict["_id"] = await users.insert(user_dict)
+        publish_change("users", user_dict["_id"])
 
         return JSONResponse(content={"id": user_dict["_id"], **user_dict})
     
@@ -54,65 +68,74 @@ async def create_user(user: UserIn):
 
 # ------------------- DELETE by ID -------------------
 @router.delete("/{user_id}", status_code=204)
-async def delete_user(user_id: str):
+async def delete_user(user_id: str, users: UserRepository = Depends(get_user_repo)):
     if not ObjectId.is_valid(user_id):
         raise HTTPException(400, detail="ID nije validan")
 
-    result = await users_col.delete_one({"_id": ObjectId(user_id)})
-    if result.deleted_count == 0:
+    affected = await users.delete(user_id)
+    if affected is None:
         raise HTTPException(404, detail="Korisnik nije pronađen")
+    # i korisnici iz cijih followers/following je obrisani uklonjen (njihovi profili u kesu)
+    for changed_id in [user_id, *affected]:
+        publish_change("users", changed_id)
 
 # ------------------- DELETE by Username Contains -------------------
 @router.delete("/delete_by_username/")
-async def delete_users_by_username(username: str = Query(..., min_length=3)):
-    query = {"username": {"$regex": username, "$options": "i"}}
-    result = await users_col.delete_many(query)
-
-    if result.deleted_count == 0:
+async def delete_users_by_username(
+    username: str = Query(..., min_length=3),
+    users: UserRepository = Depends(get_user_repo),
+):
+    deleted, affected = await users.delete_by_username_contains(username)
+    deleted_count = len(deleted)
+
+    if deleted_count == 0:
         raise HTTPException(404, detail="Nijedan korisnik sa takvim imenom nije pronađen")
+    for changed_id in [*deleted, *affected]:
+        publish_change("users", changed_id)
 
-    return {"message": f"Obrisano {result.deleted_count} korisnika sa imenom koje sadrži '{username}'."}
+    return {"message": f"Obrisano {deleted_count} korisnika sa imenom koje sadrži '{username}'."}
 
 # ------------------- PATCH -------------------
 @router.patch("/updateMe", response_model=UserDB)
-async def update_user_patch(userupdate: UserUpdate, current_user: UserDB = Depends(get_current_user)):
+async def update_user_patch(
+    userupdate: UserUpdate,
+    current_user: UserDB = Depends(get_current_user),
+    users: UserRepository = Depends(get_user_repo),
+):
     
     user_id = str(current_user.id)
     update_data = userupdate.model_dump(exclude_none=True, exclude_unset=True)
 
     # Hash password ako se menja
     if "password" in update_data:
-        update_data["password"] = bcrypt.hashpw(
-            update_data["password"].encode(), bcrypt.gensalt()
-        ).decode()
+        update_data["password"] = (await run_in_threadpool(
+            bcrypt.hashpw, update_data["password"].encode(), bcrypt.gensalt()
+        )).decode()
 
     if not update_data:
         raise HTTPException(400, detail="Nema podataka za ažuriranje")
 
-    result = await users_col.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": update_data}
-    )
-
-    if result.matched_count == 0:
+    if not await users.update(user_id, update_data):
         raise HTTPException(404, detail="Korisnik nije pronađen")
 
-    updated_user = await users_col.find_one({"_id": ObjectId(user_id)})
-    updated_user["_id"] = str(updated_user["_id"])
+    updated_user = await users.get(user_id)
+    publish_change("users", user_id)
     return UserDB(**updated_user)
 
 # ------------------- GET_ALL_USERS -------------------
 #vrati sve korisnike:
 @router.get("/", response_model=list[UserPublic])
-async def get_all_users():
-    docs=[]
-    async for user in users_col.find():
-        docs.append(UserPublic(**user))
+async def get_all_users(
+    sel: FieldSelection = Depends(user_fields),
+    users: UserRepository = Depends(get_user_repo),
+):
+    # projekcija -> password, followers i following se ne citaju iz baze
+    docs = [sel.dump(user) for user in await users.list(sel.projection)]
         
     if not docs:
         raise HTTPException(404, "Jos uvek nema korisnika")
     
-    return docs
+    return JSONResponse(docs)
 
 
 
@@ -120,30 +143,30 @@ async def get_all_users():
 
 #korisnici mogu medjusobno da se prate, ulogovani korisnik ce da zaprati
 @router.post("/follow/{username}")
-async def follow_user_with_username(username: str, current_user: UserDB = Depends(get_current_user)):
+async def follow_user_with_username(
+    username: str,
+    current_user: UserDB = Depends(get_current_user),
+    users: UserRepository = Depends(get_user_repo),
+):
     usernamecurrent = str(current_user.username)
 
     if usernamecurrent == username:
         raise HTTPException(400, "Ne možeš zapratiti sam sebe")
 
-    user = await users_col.find_one({"username": username})
+    user = await users.get_by_username(username, {"_id": 1})
     if not user:
         raise HTTPException(404, "Ne postoji korisnik kog želiš da zapratiš")
 
     if username in current_user.following:
         raise HTTPException(400, "Već pratiš ovog korisnika")
 
-    # Update korisnika kog zapraćuješ -> dodaj pratioca
-    await users_col.update_one(
-        {"username": username},
-        {"$addToSet": {"followers": usernamecurrent}}
-    )
+    # dodaj pratioca kod korisnika kog zapraćuješ + dodaj da ga trenutni korisnik prati
+    await users.follow(usernamecurrent, username)
+    publish_change("users", user["_id"])
+    publish_change("users", current_user.id)
+    await record_activity(follows=1)
 
-    # Update trenutno ulogovanog korisnika -> dodaj da on prati drugog
-    await users_col.update_one(
-        {"username": usernamecurrent},
-        {"$addToSet": {"following": username}}
-    )
+    await emit("follow", [username], actor=usernamecurrent)
 
     return {"msg": "Uspešno si zapratio korisnika"}
 
@@ -151,38 +174,35 @@ async def follow_user_with_username(username: str, current_user: UserDB = Depend
     
 
 @router.post("/unfollow/{username}")
-async def unfollow_user_with_username(username: str, current_user: UserDB = Depends(get_current_user)):
+async def unfollow_user_with_username(
+    username: str,
+    current_user: UserDB = Depends(get_current_user),
+    users: UserRepository = Depends(get_user_repo),
+):
     usernamecurrent = str(current_user.username)
 
     if usernamecurrent == username:
         raise HTTPException(400, "Ne možeš otpratiti sam sebe")
 
-    user = await users_col.find_one({"username": username})
+    user = await users.get_by_username(username, {"_id": 1})
     if not user:
         raise HTTPException(404, "Ne postoji korisnik kog želiš da otpratiš")
 
     if username not in current_user.following:
         raise HTTPException(400, "Ne pratiš tog korisnika")
 
-    # izbrisi me iz liste followers kod target usera
-    await users_col.update_one(
-        {"username": username},
-        {"$pull": {"followers": usernamecurrent}}
-    )
-
-    # izbrisi target username iz liste following kod mene
-    await users_col.update_one(
-        {"username": usernamecurrent},
-        {"$pull": {"following": username}}
-    )
+    # izbrisi me iz liste followers kod target usera i target iz moje liste following
+    await users.unfollow(usernamecurrent, username)
+    publish_change("users", user["_id"])
+    publish_change("users", current_user.id)
 
     return {"msg": "Uspešno si otpratio korisnika"}
 
 
 # Prikaži sve pratioce (followers) po username
 @router.get("/followers/{username}")
-async def get_all_followers(username: str):
-    user = await users_col.find_one({"username": username})
+async def get_all_followers(username: str, users: UserRepository = Depends(get_user_repo)):
+    user = await users.get_by_username(username, {"followers": 1})
     if not user:
         raise HTTPException(404, "Korisnik nije pronađen")
 
@@ -190,18 +210,13 @@ async def get_all_followers(username: str):
     if not follower_usernames:
         return []
 
-    followers = await users_col.find(
-        {"username": {"$in": follower_usernames}},
-        {"username": 1}
-    ).to_list(length=None)
-
-    return [f["username"] for f in followers if "username" in f]
+    return await users.existing_usernames(follower_usernames)
 
 
 # Prikaži sve koje korisnik prati (following) po username
 @router.get("/following/{username}")
-async def get_all_following(username: str):
-    user = await users_col.find_one({"username": username})
+async def get_all_following(username: str, users: UserRepository = Depends(get_user_repo)):
+    user = await users.get_by_username(username, {"following": 1})
     if not user:
         raise HTTPException(404, "Korisnik nije pronađen")
 
@@ -209,68 +224,74 @@ async def get_all_following(username: str):
     if not following_usernames:
         return []
 
-    following = await users_col.find(
-        {"username": {"$in": following_usernames}},
-        {"username": 1}
-    ).to_list(length=None)
-
-    return [f["username"] for f in following if "username" in f]
+    return await users.existing_usernames(following_usernames)
 
 
 
 
 @router.get("/user-info/by-username/{username}")
-async def get_user_info_by_username(username: str):
-    # Nadji korisnika
-    user = await users_col.find_one({"username": username})
+async def get_user_info_by_username(
+    username: str,
+    users: UserRepository = Depends(get_user_repo),
+    ideas_repo: IdeaRepository = Depends(get_idea_repo),
+    evaluations: EvaluationRepository = Depends(get_evaluation_repo),
+):
+    profile = profile_cache.get(username)
+    if profile is not None:
+        return profile
+
+    # Nadji korisnika; followers/following su vec username-ovi u dokumentu
+    user = await users.get_by_username(username, {"password": 0})
     if not user:
         raise HTTPException(404, "Korisnik ne postoji")
 
-    # Sve ideje koje je kreirao
-    ideas = await ideas_col.find(
-        {"created_by": str(user["_id"])}, 
-        {"title": 1}
-    ).to_list(length=None)
-
-    # Followers i following po username (da vracamo listu stringova)
-    follower_usernames = user.get("followers", [])
-    following_usernames = user.get("following", [])
-
-    followers = await users_col.find(
-        {"username": {"$in": follower_usernames}}, 
-        {"username": 1}
-    ).to_list(length=None)
-
-    following = await users_col.find(
-        {"username": {"$in": following_usernames}}, 
-        {"username": 1}
-    ).to_list(length=None)
-
-    return {
+    # Sve ideje koje je kreirao + lajkovi i ocene za sve njih jednim upitom
+    ideas = await ideas_repo.list_by_creator(user["_id"], {"title": 1})
+    totals = await evaluations.totals_for_ideas(i["_id"] for i in ideas)
+
+    idea_list = []
+    for idea in ideas:
+        t = totals.get(idea["_id"], {})
+        score_count = t.get("score_count", 0)
+        idea_list.append({
+            "id": idea["_id"],
+            "title": idea.get("title"),
+            "like_count": t.get("likes", 0),
+            "score_count": score_count,
+            "avg_score": round(t["score_sum"] / score_count, 2) if score_count else 0,
+        })
+
+    profile = {
         "username": user["username"],
         "email": user["email"],
         "title": user.get("title", ""),
         "description": user.get("description", ""),
         "location": user.get("location", ""),
         "skills": user.get("skills", []),
-        "ideas": [{"id": str(i["_id"]), "title": i["title"]} for i in ideas],
-        "followers": [f["username"] for f in followers],
-        "following": [f["username"] for f in following],
+        "ideas": idea_list,
+        "followers": user.get("followers", []),
+        "following": user.get("following", []),
     }
+    tags = [("users", user["_id"])] + [("ideas", i["_id"]) for i in ideas]
+    profile_cache.set(username, profile, tags=tags)
+    return profile
 
 @router.get("/ideas/by-popular-creators")
-async def get_ideas_by_popular_creators():
-    users = await users_col.find().to_list(length=None)
+async def get_ideas_by_popular_creators(
+    users: UserRepository = Depends(get_user_repo),
+    ideas_repo: IdeaRepository = Depends(get_idea_repo),
+):
+    all_users = await users.list({"username": 1, "followers": 1})
     
     # Sortiraj korisnike po broju pratilaca
-    sorted_users = sorted(users, key=lambda u: len(u.get("followers", [])), reverse=True)
+    sorted_users = sorted(all_users, key=lambda u: len(u.get("followers", [])), reverse=True)
 
     result = []
     for user in sorted_users:
-        ideas = await ideas_col.find({"created_by": str(user["_id"])}).to_list(length=None)
+        ideas = await ideas_repo.list_by_creator(user["_id"], {"title": 1})
         for idea in ideas:
             result.append({
-                "id": str(idea["_id"]),
+                "id": idea["_id"],
                 "title": idea["title"],
                 "creator": user["username"],
                 "followers_count": len(user.get("followers", []))
@@ -0,0 +1,36 @@
+from functools import lru_cache
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# Konfiguracija iz environment-a (ili .env fajla), npr.
+#   MONGO_URI=mongodb://db1,db2/?replicaSet=rs0 MONGO_MAX_POOL_SIZE=50 uvicorn main:app
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    mongo_uri: str = "mongodb://localhost:27017"
+    mongo_db: str = "doc-backend"
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_connect_timeout_ms: int = 5000
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_socket_timeout_ms: Optional[int] = None      # None = bez timeout-a
+    mongo_compressors: str = "zstd,zlib"               # "" = bez kompresije saobracaja
+    mongo_read_preference: Literal[
+        "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+    ] = "primary"
+    # broj konekcija koje se otvore (ping) pre nego sto worker primi prvi zahtev
+    mongo_warmup_connections: int = 10
+    # reference (created_by, idea_id...) se upisuju kao ObjectId; ukljuciti tek posle migracije 0001
+    mongo_write_objectid_refs: bool = False
+
+    # "mongo" ili "memory" (testovi i benchmark bez mongod-a)
+    repository_backend: Literal["mongo", "memory"] = "mongo"
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
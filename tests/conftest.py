@@ -0,0 +1,25 @@
+import pytest
+
+import cache
+from admission import admission
+from repositories import create_repositories, set_repositories
+
+# Testovi rade nad in-memory backendom, app se zove direktno (benchmarks.client), bez servera.
+# Svaki test dobija prazan backend, prazne keseve i admission kontrolu u pocetnom stanju.
+
+
+@pytest.fixture
+def repos():
+    repositories = create_repositories("memory")
+    set_repositories(repositories)
+    cache.clear_all()
+    admission.__init__()
+    yield repositories
+    set_repositories(None)
+
+
+@pytest.fixture
+def app(repos):
+    from main import app
+
+    return app
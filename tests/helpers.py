@@ -0,0 +1,52 @@
+import json
+from datetime import datetime, timedelta
+
+from auth.jwt_handler import create_access_token
+from benchmarks.client import call
+
+# hash se nikad ne proverava, bcrypt bi samo usporio testove
+PASSWORD_HASH = "$2b$12$" + "x" * 53
+
+
+async def add_user(repos, username: str) -> str:
+    return await repos.users.insert({
+        "username": username,
+        "email": f"{username}@test.local",
+        "password": PASSWORD_HASH,
+        "role": "user",
+        "followers": [],
+        "following": [],
+    })
+
+
+async def add_idea(repos, user_id: str, title: str = "Ideja", market: str = "fintech",
+                   target_audience: str = "studenti", age: timedelta = timedelta(0)) -> str:
+    return await repos.ideas.insert({
+        "title": title,
+        "description": "Opis",
+        "market": market,
+        "target_audience": target_audience,
+        "created_at": datetime.utcnow() - age,
+        "created_by": user_id,
+    })
+
+
+async def evaluate(repos, idea_id: str, user_id: str, score: int = 5, liked: bool = False):
+    before, after = await repos.evaluations.upsert(idea_id, user_id, {"score": score, "liked": liked, "comment": ""})
+    if bool(before and before.get("liked")) != after["liked"]:
+        await repos.ideas.inc_like_count(idea_id, 1 if after["liked"] else -1)
+
+
+def auth_header(user_id: str) -> dict:
+    return {"authorization": f"Bearer {create_access_token(data={'sub': user_id})}"}
+
+
+async def get_json(app, path: str, headers: dict | None = None):
+    response = await call(app, "GET", path, {"cache-control": "no-cache", **(headers or {})})
+    return response["status"], json.loads(response["body"])
+
+
+async def post_json(app, path: str, payload, headers: dict | None = None):
+    body = json.dumps(payload).encode()
+    response = await call(app, "POST", path, {"content-type": "application/json", **(headers or {})}, body)
+    return response["status"], json.loads(response["body"])
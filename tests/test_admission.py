@@ -0,0 +1,54 @@
+import asyncio
+
+from admission import CostClass, Limiter, admission
+from benchmarks.client import call
+from tests.helpers import add_idea, add_user
+
+NO_CACHE = {"cache-control": "no-cache"}
+
+
+def test_heavy_route_returns_429_with_retry_after_when_bucket_is_empty(app, repos):
+    async def scenario():
+        await add_idea(repos, await add_user(repos, "autor"))
+        burst = admission.limiters["heavy"].cost.burst
+        statuses = [(await call(app, "GET", "/ideas/", NO_CACHE))["status"] for _ in range(burst)]
+        rejected = await call(app, "GET", "/ideas/", NO_CACHE)
+        return statuses, rejected
+
+    statuses, rejected = asyncio.run(scenario())
+    assert set(statuses) == {200}
+    assert rejected["status"] == 429
+    assert int(rejected["headers"]["retry-after"]) >= 1
+    assert admission.snapshot()["heavy"]["rejected_rate"] == 1
+
+
+def test_heavy_route_returns_503_when_queue_is_full(app, repos, monkeypatch):
+    admission.limiters["heavy"] = Limiter(
+        CostClass("heavy", concurrency=1, queue_size=0, queue_timeout=0.05, rate=100, burst=100)
+    )
+    list_ideas = repos.ideas.list
+
+    async def slow_list(*args, **kwargs):
+        await asyncio.sleep(0.1)
+        return await list_ideas(*args, **kwargs)
+
+    monkeypatch.setattr(repos.ideas, "list", slow_list)
+
+    async def scenario():
+        await add_idea(repos, await add_user(repos, "autor"))
+        return await asyncio.gather(*(call(app, "GET", "/ideas/", NO_CACHE) for _ in range(2)))
+
+    responses = asyncio.run(scenario())
+    assert sorted(r["status"] for r in responses) == [200, 503]
+    shed = next(r for r in responses if r["status"] == 503)
+    assert int(shed["headers"]["retry-after"]) >= 1
+    assert admission.limiters["heavy"].active == 0
+
+
+def test_cheap_route_is_not_limited(app, repos):
+    async def scenario():
+        idea_id = await add_idea(repos, await add_user(repos, "autor"))
+        burst = admission.limiters["heavy"].cost.burst
+        return [(await call(app, "GET", f"/ideas/{idea_id}", NO_CACHE))["status"] for _ in range(burst * 3)]
+
+    assert set(asyncio.run(scenario())) == {200}
@@ -0,0 +1,13 @@
+import asyncio
+from argparse import Namespace
+
+from benchmarks.api import run
+
+# Smoke test nad in-memory backendom: benchmark seed-uje podatke i pusta svaki
+# scenario kroz app u istom procesu, pa pada cim neki endpoint ne vrati 200.
+
+
+def test_benchmark_scenarios_memory_backend():
+    args = Namespace(backend="memory", iterations=1, users=10, ideas_per_user=2,
+                     evaluations=5, follows_per_user=3, seed=1)
+    asyncio.run(run(args))
@@ -0,0 +1,38 @@
+import asyncio
+
+from tests.helpers import add_idea, add_user, evaluate, get_json, post_json
+
+
+def test_batch_items_with_different_ids_do_not_share_lookups(app, repos):
+    async def scenario():
+        author = await add_user(repos, "autor")
+        expected = {}
+        for i in range(20):
+            user_id = await add_user(repos, f"ocenjivac{i}")
+            idea_id = await add_idea(repos, author, title=f"Ideja {i}")
+            await evaluate(repos, idea_id, user_id)
+            expected[idea_id] = f"ocenjivac{i}"
+
+        payload = {"requests": [{"path": f"/evaluations/vratisveocene/{idea_id}"} for idea_id in expected]}
+        status, results = await post_json(app, "/batch", payload)
+        assert status == 200
+        for idea_id, result in zip(expected, results):
+            assert result["status"] == 200
+            assert [row["Korisnik"] for row in result["body"]] == [expected[idea_id]]
+
+    asyncio.run(scenario())
+
+
+def test_batch_item_path_is_percent_decoded_like_direct_request(app, repos):
+    async def scenario():
+        await add_user(repos, "marko x")
+        await add_user(repos, "ana")
+        await repos.users.follow("ana", "marko x")
+
+        direct = await get_json(app, "/users/followers/marko%20x")
+        status, results = await post_json(app, "/batch", {"requests": [{"path": "/users/followers/marko%20x"}]})
+        assert status == 200
+        assert direct == (200, ["ana"])
+        assert (results[0]["status"], results[0]["body"]) == direct
+
+    asyncio.run(scenario())
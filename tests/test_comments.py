@@ -0,0 +1,52 @@
+import asyncio
+import base64
+
+from tests.helpers import add_idea, add_user, auth_header, get_json, post_json
+
+
+async def _all_pages(app, path: str) -> list:
+    items, cursor = [], None
+    while True:
+        status, page = await get_json(app, path + (f"&cursor={cursor}" if cursor else ""))
+        assert status == 200
+        assert len(page["items"]) <= 10
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_comment_pages_are_chronological_without_gaps(app, repos):
+    async def scenario():
+        user_id = await add_user(repos, "ana")
+        idea_id = await add_idea(repos, await add_user(repos, "autor"))
+        headers = auth_header(user_id)
+
+        for i in range(25):
+            status, comment = await post_json(app, f"/ideas/{idea_id}/comments", {"text": f"komentar {i}"}, headers)
+            assert status == 201 and comment["username"] == "ana"
+        parent = comment["_id"]   # poslednji komentar najviseg nivoa
+        for i in range(3):
+            status, _ = await post_json(app, f"/ideas/{idea_id}/comments",
+                                        {"text": f"odgovor {i}", "parent_id": parent}, headers)
+            assert status == 201
+
+        top = await _all_pages(app, f"/ideas/{idea_id}/comments?limit=10")
+        replies = await _all_pages(app, f"/ideas/{idea_id}/comments?parent_id={parent}&limit=10")
+        _, idea = await get_json(app, f"/ideas/{idea_id}")
+        return top, replies, idea
+
+    top, replies, idea = asyncio.run(scenario())
+    assert [c["text"] for c in top] == [f"komentar {i}" for i in range(25)]
+    assert [c["text"] for c in replies] == [f"odgovor {i}" for i in range(3)]
+    assert top[-1]["reply_count"] == 3
+    assert idea["comment_count"] == 28
+
+
+def test_comments_reject_malformed_cursor(app, repos):
+    async def scenario():
+        idea_id = await add_idea(repos, await add_user(repos, "autor"))
+        cursor = base64.urlsafe_b64encode(b"2024-01-01T00:00:00|zzz").decode()
+        return (await get_json(app, f"/ideas/{idea_id}/comments?cursor={cursor}"))[0]
+
+    assert asyncio.run(scenario()) == 400
@@ -0,0 +1,27 @@
+import asyncio
+import gzip
+import json
+
+from benchmarks.client import call
+from tests.helpers import add_user
+
+ORIGIN = "http://localhost:3000"
+
+
+def test_cached_response_gets_cors_headers_for_each_origin(app, repos):
+    async def scenario():
+        for i in range(30):
+            await add_user(repos, f"korisnik{i}")
+
+        plain = await call(app, "GET", "/users/", {"accept-encoding": "gzip"})
+        cross = await call(app, "GET", "/users/", {"accept-encoding": "gzip", "origin": ORIGIN})
+        return plain, cross
+
+    plain, cross = asyncio.run(scenario())
+    assert plain["status"] == cross["status"] == 200
+    assert "access-control-allow-origin" not in plain["headers"]
+    assert cross["headers"]["access-control-allow-origin"] in ("*", ORIGIN)
+    # drugi odgovor je iz kesa, isto kompresovano telo
+    assert cross["headers"]["content-encoding"] == "gzip"
+    assert cross["body"] == plain["body"]
+    assert len(json.loads(gzip.decompress(cross["body"]))) == 30
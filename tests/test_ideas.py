@@ -0,0 +1,70 @@
+import asyncio
+import base64
+from datetime import timedelta
+
+from tests.helpers import add_idea, add_user, evaluate, get_json
+
+
+def _counts(facet: list) -> dict:
+    return {row["value"]: row["count"] for row in facet}
+
+
+def test_facets_drill_down_keeps_options_of_filtered_field(app, repos):
+    async def scenario():
+        author = await add_user(repos, "autor")
+        for market, audience in [("fintech", "studenti")] * 3 + [("fintech", "firme")] * 2 + [("edtech", "studenti")]:
+            await add_idea(repos, author, market=market, target_audience=audience)
+        return await get_json(app, "/ideas/facets"), await get_json(app, "/ideas/facets?market=fintech")
+
+    (status, all_ideas), (drill_status, fintech) = asyncio.run(scenario())
+    assert status == drill_status == 200
+    assert all_ideas["total"] == 6
+    assert _counts(all_ideas["market"]) == {"fintech": 5, "edtech": 1}
+    assert _counts(all_ideas["target_audience"]) == {"studenti": 4, "firme": 2}
+    # market brojevi ne primenjuju filter po marketu, publika se broji samo u fintech-u
+    assert fintech["total"] == 5
+    assert _counts(fintech["market"]) == {"fintech": 5, "edtech": 1}
+    assert _counts(fintech["target_audience"]) == {"studenti": 3, "firme": 2}
+
+
+async def _pages(app, query: str) -> list:
+    items, cursor = [], None
+    while True:
+        path = f"/ideas/browse?{query}&limit=10" + (f"&cursor={cursor}" if cursor else "")
+        status, page = await get_json(app, path)
+        assert status == 200
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_browse_cursor_walks_every_idea_once_in_order(app, repos):
+    async def scenario():
+        author = await add_user(repos, "autor")
+        voters = [await add_user(repos, f"glasac{i}") for i in range(4)]
+        for i in range(25):
+            idea_id = await add_idea(repos, author, title=f"Ideja {i}", market="fintech" if i % 2 else "edtech",
+                                     age=timedelta(minutes=i))
+            for voter in voters[:i % 5]:
+                await evaluate(repos, idea_id, voter, liked=True)
+        return (await _pages(app, "sort=new"), await _pages(app, "sort=likes"),
+                await _pages(app, "sort=new&market=fintech"))
+
+    newest, most_liked, fintech = asyncio.run(scenario())
+    assert [i["title"] for i in newest] == [f"Ideja {i}" for i in range(25)]
+    assert len({i["_id"] for i in most_liked}) == 25
+    likes = [i["like_count"] for i in most_liked]
+    assert likes == sorted(likes, reverse=True)
+    assert [i["title"] for i in fintech] == [f"Ideja {i}" for i in range(1, 25, 2)]
+
+
+def test_browse_rejects_malformed_cursor(app, repos):
+    async def scenario():
+        statuses = []
+        for raw, sort in [("new|2024-01-01T00:00:00|zzz", "new"), ("likes|3|" + "a" * 24, "new"), ("nije cursor", "new")]:
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            statuses.append((await get_json(app, f"/ideas/browse?sort={sort}&cursor={cursor}"))[0])
+        return statuses
+
+    assert asyncio.run(scenario()) == [400, 400, 400]
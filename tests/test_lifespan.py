@@ -0,0 +1,32 @@
+import asyncio
+
+import main
+import notifications
+from benchmarks.client import lifespan
+
+
+def test_shutdown_after_emit(app):
+    async def scenario():
+        async with lifespan(app):
+            await notifications.emit("follow", ["marko"], actor="ana")
+
+    asyncio.run(asyncio.wait_for(scenario(), 3))
+
+
+def test_shutdown_does_not_wait_for_stuck_task(app, monkeypatch):
+    async def stubborn():
+        # prvi cancel (iz lifespan-a) ignorise, drugi (asyncio.run na kraju) ga gasi
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(main, "dispatcher", stubborn)
+    monkeypatch.setattr(main, "SHUTDOWN_TIMEOUT", 0.1)
+
+    async def scenario():
+        async with lifespan(app):
+            pass
+
+    asyncio.run(asyncio.wait_for(scenario(), 3))
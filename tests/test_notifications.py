@@ -0,0 +1,26 @@
+import asyncio
+
+import notifications
+
+
+def test_dispatcher_stops_on_cancel_after_emit(repos):
+    async def scenario():
+        task = asyncio.create_task(notifications.dispatcher())
+        await asyncio.sleep(0)
+        await notifications.emit("follow", ["marko"], actor="ana")
+        task.cancel()
+        await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), 1)
+        assert task.cancelled()
+
+    # dva event loop-a zaredom: Event ne sme ostati vezan za prvi
+    asyncio.run(scenario())
+    asyncio.run(scenario())
+
+
+def test_emit_without_dispatcher_only_writes_outbox(repos):
+    async def scenario():
+        await notifications.emit("follow", ["marko", "ana"], actor="ana")
+        return await repos.notifications.undelivered("marko", 10)
+
+    rows = asyncio.run(scenario())
+    assert [row["type"] for row in rows] == ["follow"]
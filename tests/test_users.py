@@ -0,0 +1,41 @@
+import asyncio
+
+from benchmarks.client import call
+from tests.helpers import add_user, get_json
+
+
+def test_deleting_user_refreshes_cached_profiles_of_followers(app, repos):
+    async def scenario():
+        ana = await add_user(repos, "ana")
+        await add_user(repos, "marko")
+        await add_user(repos, "jovan")
+        await repos.users.follow("ana", "marko")
+        await repos.users.follow("jovan", "ana")
+
+        _, marko = await get_json(app, "/users/user-info/by-username/marko")
+        _, jovan = await get_json(app, "/users/user-info/by-username/jovan")
+        assert marko["followers"] == ["ana"] and jovan["following"] == ["ana"]
+
+        assert (await call(app, "DELETE", f"/users/{ana}"))["status"] == 204
+        _, marko = await get_json(app, "/users/user-info/by-username/marko")
+        _, jovan = await get_json(app, "/users/user-info/by-username/jovan")
+        assert marko["followers"] == [] and jovan["following"] == []
+
+    asyncio.run(scenario())
+
+
+def test_delete_by_username_refreshes_cached_profiles(app, repos):
+    async def scenario():
+        await add_user(repos, "test_a")
+        await add_user(repos, "test_b")
+        await add_user(repos, "marko")
+        await repos.users.follow("test_a", "marko")
+        await repos.users.follow("marko", "test_b")
+
+        await get_json(app, "/users/user-info/by-username/marko")
+        response = await call(app, "DELETE", "/users/delete_by_username/?username=test")
+        assert response["status"] == 200
+        _, marko = await get_json(app, "/users/user-info/by-username/marko")
+        assert marko["followers"] == [] and marko["following"] == []
+
+    asyncio.run(scenario())